@@ -1,14 +1,17 @@
 # Note: not using PMI insurance for now, which complicates the calculation and it has to be paid only
 #       till the lender reaches 20% equity in the property, i.e. considerably inaccurate for downpayment << 20%
 
-import inspect
-from math import exp, log
-from me_calculator.me_calculator_decorators import argument_checker
-
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.pyplot as plt
-from matplotlib import cm
-from matplotlib.ticker import LinearLocator, FormatStrFormatter
+from time import perf_counter
+from me_calculator import me_calculator_derivatives, me_calculator_profiling
+from me_calculator.me_calculator_export import export_sweep
+from me_calculator.me_calculator_decorators import argument_checker, plottable as plottable_method, plottable_registry
+from me_calculator.me_calculator_errors import UnknownParameter
+from me_calculator.me_calculator_parallel import evaluate_tile, evaluate_tiles
+from me_calculator.me_calculator_sampling import adaptive_1d, adaptive_2d
+from me_calculator.me_calculator_scenario import MeCalculatorScenario
+from me_calculator.me_calculator_solvers import solve_crossing
+from me_calculator.me_calculator_sweep import reduce_tiles, sweep_tiles
+
 import numpy as np
 
 
@@ -47,104 +50,241 @@ class MeCalculator:
                                     "property_value_growth_rate": [property_value_growth_rate, property_value_growth_rate_min, property_value_growth_rate_max, " [fraction of home price]"],
                                     "pmi_insurance": [pmi_insurance, pmi_insurance_min, pmi_insurance_max, "[fraction of home price]"],
                                     "time": [None, time_range_min, time_range_max, " [years]"]}
-        self.mortgage_plottables = {"mortgage_payment": [" [$]"],
-                                    "mortgage_duration": [" [years]"],
-                                    "mortgage_principal": [" [$]"],
-                                    "mortgage_interest_rate": [" [fraction of principal]"],
-                                    "mortgage_interest": [" [$]"],
-                                    "mortgage_escrow": [" [$]"],
-                                    "mortgage": [" [$]"],
-                                    "property_value": [" [$]"],
-                                    "mortgage_principal_residual": [" [$]"],
-                                    "mortgage_principal_paid": [" [$]"],
-                                    "mortgage_interest_residual": [" [$]"],
-                                    "mortgage_interest_paid": [" [$]"],
-                                    "mortgage_escrow_residual": [" [$]"],
-                                    "mortgage_escrow_paid": [" [$]"],
-                                    "mortgage_residual": [" [$]"],
-                                    "mortgage_paid": [" [$]"],
-                                    "total_cost": [" [$]"],
-                                    "total_cost_residual": [" [$]"],
-                                    "total_cost_paid": [" [$]"],
-                                    "accrued_costs": [" [$]"],
-                                    "home_purchase_total_return": [" [$]"],
-                                    "home_purchase_net_return": [" [$]"],
-                                    "no_home_purchase_total_return": [" [$]"]}
+        self.mortgage_plottables = {name: [registered.units] for name, registered in MeCalculatorFunctions.plottables.items()}
         self.functions = MeCalculatorFunctions(cost_per_point, discount_per_point, closing_costs, escrow_rate, property_value_growth_rate, pmi_insurance, price_to_rent_ratio, market_rate_of_return)
         self.plot_colors = ['red', 'blue', 'black', 'green', 'cyan', 'orange', 'purple']
+        # Grid evaluation runs on this many workers (None for all cores, 1 to stay serial) of the given executor:
+        # "thread", "process" or a concurrent.futures.Executor
+        self.workers = 1
+        self.executor = "thread"
+        # Optional MeCalculatorCache: data_2d and data_nd grids are then stored on disk and reused across runs
+        # (values returned from the cache are read-only memory maps)
+        self.cache = None
+
+    # Plotting lives in me_calculator_plotting, imported on first use so that the
+    # computational core does not load matplotlib.
 
     @argument_checker
     def plot_1d(self, x_parameter, y_plottables):
-        for i, y_plottable in enumerate(y_plottables):
-             selected_function = getattr(self.functions, y_plottable)
-             x, y = self.data_1d(selected_function, x_parameter)
-             plt.plot(x, y, lw=1.5, color=self.plot_colors[i], label=y_plottable + self.mortgage_plottables[y_plottable][0])
-        plt.xlabel(x_parameter + self.mortgage_parameters[x_parameter][3], labelpad=8)
-        plt.xticks(fontsize=8)
-        plt.yticks(fontsize=8)
-        plt.grid()
-        plt.legend()
-        plt.show()
-
-    def data_1d(self, function, x_parameter):
-        parameters = inspect.getfullargspec(function).args[1:]
-        x_parameter_index = parameters.index(x_parameter)
-        parameter_values = [self.mortgage_parameters[parameter][0] for parameter in parameters]
-        x = []
-        y = []
-        x_parameter_range = self.mortgage_parameters[x_parameter][2] - self.mortgage_parameters[x_parameter][1]
-        for x_parameter_step in range(0, 1000):
-            x_parameter_value = (x_parameter_step * x_parameter_range / 1000.) + self.mortgage_parameters[x_parameter][1]
-            parameter_values[x_parameter_index] = x_parameter_value
-            plottable = 0.
-            try:
-                plottable = function(*parameter_values)
-            except ValueError:
-                continue
-            x.append(x_parameter_value)
-            y.append(plottable)
-        return x, y
+        from me_calculator import me_calculator_plotting
+        me_calculator_plotting.plot_1d(self, x_parameter, y_plottables)
 
     @argument_checker
     def plot_2d(self, x_parameter, y_parameter, z_plottable):
-        plottable_function = getattr(self.functions, z_plottable)
-        parameters = inspect.getfullargspec(plottable_function).args[1:]
-        x_parameter_index = parameters.index(x_parameter)
-        y_parameter_index = parameters.index(y_parameter)
-        parameter_values = [self.mortgage_parameters[parameter][0] for parameter in parameters]
-        x_parameter_range = self.mortgage_parameters[x_parameter][2] - self.mortgage_parameters[x_parameter][1]
-        y_parameter_range = self.mortgage_parameters[y_parameter][2] - self.mortgage_parameters[y_parameter][1]
-        x = np.arange(self.mortgage_parameters[x_parameter][1], self.mortgage_parameters[x_parameter][2], x_parameter_range / 1000.)
-        y = np.arange(self.mortgage_parameters[y_parameter][1], self.mortgage_parameters[y_parameter][2], y_parameter_range / 1000.)
+        from me_calculator import me_calculator_plotting
+        me_calculator_plotting.plot_2d(self, x_parameter, y_parameter, z_plottable)
+
+    # Off-screen versions for reports (see me_calculator_rendering): no display needed, the figure is written to path
+    # (format from its extension, png or svg) and the path returned, or returned as bytes without a path.
+    # 2d plots are a "heatmap" (an image, the cheapest), "contour" or "surface" (evaluated at a lower level of detail).
+
+    @argument_checker
+    def render_1d(self, x_parameter, y_plottables, path=None, format=None, resolution=1000, size=(6.4, 4.8), dpi=100):
+        from me_calculator import me_calculator_rendering
+        return me_calculator_rendering.render_1d(self, x_parameter, y_plottables, path, format, resolution, size, dpi)
+
+    @argument_checker
+    def render_2d(self, x_parameter, y_parameter, z_plottable, kind="heatmap", path=None, format=None, resolution=None, size=(6.4, 4.8), dpi=100):
+        from me_calculator import me_calculator_rendering
+        return me_calculator_rendering.render_2d(self, x_parameter, y_parameter, z_plottable, kind, path, format, resolution, size, dpi)
+
+    def render_batch(self, jobs, directory, format="png", workers=None):
+        # Many render_1d/render_2d figures (dicts of their arguments) written to directory by parallel processes,
+        # see me_calculator_rendering.render_batch; returns their paths
+        from me_calculator import me_calculator_rendering
+        return me_calculator_rendering.render_batch(self, jobs, directory, format, workers)
+
+    # Evaluation engine: the data_* methods return NumPy arrays and never touch matplotlib.
+    # Parameter axes sample [min, max) of mortgage_parameters (or the given range) with the given resolution,
+    # all other arguments are taken from the values in mortgage_parameters.
+    # valid is False where the plottable is out of domain (the value there is NaN).
+
+    @argument_checker
+    def data_1d(self, x_parameter, y_plottable, resolution=1000, x_range=None):
+        x = self.parameter_axis(x_parameter, resolution, x_range)
+        y = self._evaluate(y_plottable, {x_parameter: x})
+        return x, y, np.isfinite(y)
+
+    @argument_checker
+    def data_1d_plottables(self, x_parameter, y_plottables, resolution=1000, x_range=None):
+        # Same as data_1d for several plottables at once, returned as lists in the order of y_plottables
+        x = self.parameter_axis(x_parameter, resolution, x_range)
+        ys = self._evaluate_plottables(y_plottables, {x_parameter: x})
+        return x, ys, [np.isfinite(y) for y in ys]
+
+    @argument_checker
+    def data_2d(self, x_parameter, y_parameter, z_plottable, resolution=1000, x_range=None, y_range=None):
+        x_resolution, y_resolution = resolution if isinstance(resolution, (list, tuple)) else (resolution, resolution)
+        x_axis = self.parameter_axis(x_parameter, x_resolution, x_range)
+        y_axis = self.parameter_axis(y_parameter, y_resolution, y_range)
+        x, y = np.meshgrid(x_axis, y_axis)
+        z = self._evaluate_grid(z_plottable, [x_parameter, y_parameter], [x_axis, y_axis], [x, y], "xy")
+        return x, y, z, np.isfinite(z)
+
+    @argument_checker
+    def data_nd(self, parameters, plottable, resolution=1000, ranges=None):
+        # Returns the 1d axes of the parameters and the values on their grid ("ij" indexing, one dimension per parameter)
+        axes = self.parameter_axes(parameters, resolution, ranges)
+        grids = np.meshgrid(*axes, indexing="ij", sparse=True)
+        values = self._evaluate_grid(plottable, parameters, axes, grids, "ij")
+        return axes, values, np.isfinite(values)
+
+    @argument_checker
+    def export_nd(self, path, parameters, plottables, resolution=100, ranges=None, dtype=np.float32, compress=False):
+        # data_nd of several plottables written to an .npz with axes, units and fixed arguments, evaluated slab by slab
+        # so that the whole grid is never in memory (see me_calculator_export.export_sweep)
+        return export_sweep(self, path, parameters, plottables, resolution, ranges, dtype, compress=compress)
+
+    @argument_checker
+    def sweep(self, parameters, plottables, resolution=100, ranges=None, tile_points=1 << 20):
+        # data_nd of several plottables, evaluated lazily: a generator of SweepTile blocks of at most tile_points points
+        # (index in the full grid, axes of the block, values of each plottable), in C order of the grid, so that memory
+        # scales with tile_points rather than with the grid. resolution can be given per parameter.
+        axes = self.parameter_axes(parameters, resolution, ranges)
+        return sweep_tiles(lambda grids: self._evaluate_plottables(plottables, dict(zip(parameters, grids))), axes, tile_points)
+
+    @argument_checker
+    def sweep_reduce(self, parameters, plottable, axis, reduction="max", resolution=100, ranges=None, tile_points=1 << 20):
+        # data_nd of the plottable reduced along the parameter axis, streamed from sweep(): its "min" or "max" (NaN
+        # ignored), or the value of axis at which it is reached ("argmin", "argmax"). Returns the axes of the other
+        # parameters and the reduced grid, NaN where the plottable is out of domain all along axis.
+        # E.g. sweep_reduce(["downpayment", "mortgage_interest_rate", "time"], "home_purchase_net_return", "downpayment",
+        # "argmax") is the best downpayment for each rate and time.
+        if axis not in parameters:
+            raise UnknownParameter(axis)
+        axes = self.parameter_axes(parameters, resolution, ranges)
+        position = list(parameters).index(axis)
+        values = reduce_tiles(self.sweep(parameters, [plottable], resolution, ranges, tile_points), axes, position, reduction)
+        return axes[:position] + axes[position + 1:], values
+
+    # Adaptive versions of data_1d/data_2d: points are concentrated where the plottable curves and around the
+    # domain boundaries (see me_calculator_sampling); tolerance is relative to the range of the plottable.
+
+    @argument_checker
+    def adaptive_data_1d(self, x_parameter, y_plottable, tolerance=1e-3, max_evaluations=1000, x_range=None):
+        x_min, x_max = x_range if x_range is not None else self.mortgage_parameters[x_parameter][1:3]
+        return adaptive_1d(lambda x: self._evaluate(y_plottable, {x_parameter: x}), x_min, x_max, tolerance, max_evaluations)
+
+    @argument_checker
+    def adaptive_data_2d(self, x_parameter, y_parameter, z_plottable, tolerance=1e-3, max_evaluations=100000, x_range=None, y_range=None):
+        x_min, x_max = x_range if x_range is not None else self.mortgage_parameters[x_parameter][1:3]
+        y_min, y_max = y_range if y_range is not None else self.mortgage_parameters[y_parameter][1:3]
+        x, y, z, valid = adaptive_2d(lambda x, y: self._evaluate(z_plottable, {x_parameter: x, y_parameter: y}),
+                                     x_min, x_max, y_min, y_max, tolerance, max_evaluations)
         x, y = np.meshgrid(x, y)
-        z = np.zeros((1000, 1000))
-        for i in range(0, 1000):
-            for j in range(0, 1000):
-                x_parameter_value = x[i][j]
-                parameter_values[x_parameter_index] = x_parameter_value
-                y_parameter_value = y[i][j]
-                parameter_values[y_parameter_index] = y_parameter_value
-                plottable = 0.
-                try:
-                    plottable = getattr(self.functions, z_plottable)(*parameter_values)
-                except ValueError:
-                    continue
-                z[i][j] = plottable
-
-        fig = plt.figure()
-        ax = fig.gca(projection='3d')
-        surf = ax.plot_surface(x, y, z, linewidth=0, cmap=plt.cm.coolwarm, antialiased=False)
-        ax.set_zlim(-1, np.amax(z) + 1)
-        fig.colorbar(surf, shrink=0.5, aspect=5)
-        plt.xlabel(x_parameter + self.mortgage_parameters[x_parameter][3], labelpad=8)
-        plt.xticks(fontsize=7)
-        plt.ylabel(y_parameter + self.mortgage_parameters[y_parameter][3], labelpad=8)
-        plt.yticks(fontsize=7)
-        plt.show()
+        return x, y, z, valid
 
+    @argument_checker
+    def goal_seek(self, x_parameter, y_plottables, target=0., parameters=None, resolution=100, ranges=None, x_range=None, tolerance=1e-10, brackets=32):
+        # Smallest value of x_parameter in x_range (by default its parameter range) at which y_plottables[0], minus
+        # y_plottables[1] if there are two, equals target. Solved at once on the grid of the other parameters, laid out
+        # as in data_nd (without parameters, on the values of mortgage_parameters); NaN where it is never reached.
+        # E.g. goal_seek("time", ["home_purchase_net_return", "no_home_purchase_total_return"]) is when buying beats renting.
+        if len(y_plottables) not in (1, 2):
+            raise ValueError("goal_seek takes one plottable, or two to compare")
+        parameters = parameters or []
+        axes = self.parameter_axes(parameters, resolution, ranges)
+        parameter_grids = dict(zip(parameters, np.meshgrid(*axes, indexing="ij", sparse=True)))
+        x_min, x_max = x_range if x_range is not None else self.mortgage_parameters[x_parameter][1:3]
+
+        def difference(x):
+            values = self._evaluate_plottables(y_plottables, dict(parameter_grids, **{x_parameter: x}))
+            return (values[0] - values[1] if len(values) > 1 else values[0]) - target
+
+        return axes, solve_crossing(difference, x_min, x_max, tuple(len(axis) for axis in axes), tolerance, brackets)
 
+    @argument_checker
+    def valid_range(self, x_parameter, y_plottable, resolution=1000, x_range=None):
+        # (lower, upper) part of x_range (by default the parameter range) inside the domain of y_plottable, the other
+        # arguments being the values in mortgage_parameters, or None if there is none. Only the domain constraints are
+        # evaluated: on a grid of the given resolution, then by bisection of the boundaries. The valid part is assumed
+        # to be an interval, as it is for all the constraints of MeCalculatorFunctions.
+        x_min, x_max = x_range if x_range is not None else self.mortgage_parameters[x_parameter][1:3]
+        x = np.linspace(x_min, x_max, resolution)
+        valid = np.flatnonzero(self._valid(y_plottable, {x_parameter: x}))
+        if not len(valid):
+            return None
+        first, last = valid[0], valid[-1]
+        lower = x[first] if first == 0 else self._domain_boundary(x_parameter, y_plottable, x[first - 1], x[first])
+        upper = x[last] if last == len(x) - 1 else self._domain_boundary(x_parameter, y_plottable, x[last + 1], x[last])
+        return float(lower), float(upper)
+
+    def parameter_axis(self, parameter, resolution=1000, parameter_range=None):
+        parameter_min, parameter_max = parameter_range if parameter_range is not None else self.mortgage_parameters[parameter][1:3]
+        return np.linspace(parameter_min, parameter_max, resolution, endpoint=False)
+
+    def parameter_axes(self, parameters, resolution=1000, parameter_ranges=None):
+        # parameter_axis of each parameter, resolution being one for all or one per parameter
+        resolutions = resolution if isinstance(resolution, (list, tuple)) else [resolution] * len(parameters)
+        parameter_ranges = parameter_ranges if parameter_ranges is not None else [None] * len(parameters)
+        return [self.parameter_axis(parameter, resolutions[i], parameter_ranges[i]) for i, parameter in enumerate(parameters)]
+
+    def _evaluate(self, plottable, parameter_grids):
+        return self._evaluate_plottables([plottable], parameter_grids)[0]
+
+    def _evaluate_grid(self, plottable, parameters, axes, grids, indexing):
+        parameter_grids = dict(zip(parameters, grids))
+        if self.cache is None:
+            return self._evaluate(plottable, parameter_grids)
+        # The key covers everything the values depend on: the grid (each axis is a linspace, so its first and
+        # last points and its length), the fixed arguments and the MeCalculatorFunctions configuration
+        fixed = {argument: self.mortgage_parameters[argument][0] for argument in self.functions.plottables[plottable].arguments if argument not in parameters}
+        key = self.cache.key(plottable=plottable, parameters=parameters, indexing=indexing, fixed=fixed, functions=vars(self.functions),
+                             axes=[[axis[0], axis[-1], len(axis)] for axis in axes])
+        return self.cache.get_or_compute(key, lambda: self._evaluate(plottable, parameter_grids))
+
+    def _inputs(self, plottables, parameter_grids):
+        inputs = {}
+        for plottable in plottables:
+            for parameter in self.functions.plottables[plottable].arguments:
+                inputs[parameter] = parameter_grids[parameter] if parameter in parameter_grids else self.mortgage_parameters[parameter][0]
+        return inputs
+
+    def _valid(self, plottable, parameter_grids):
+        shape = np.broadcast_shapes(*[np.shape(grid) for grid in parameter_grids.values()])
+        return np.broadcast_to(self.functions.scenario(**self._inputs([plottable], parameter_grids)).valid(plottable), shape)
+
+    def _domain_boundary(self, parameter, plottable, invalid, valid):
+        # Bisection of [invalid, valid] down to adjacent floats, returns the valid end
+        while True:
+            middle = 0.5 * (invalid + valid)
+            if middle == invalid or middle == valid:
+                return valid
+            if self._valid(plottable, {parameter: middle}):
+                valid = middle
+            else:
+                invalid = middle
+
+    def _evaluate_plottables(self, plottables, parameter_grids):
+        # All plottables are served by one scenario, so their shared intermediates are computed once
+        inputs = self._inputs(plottables, parameter_grids)
+        shape = np.broadcast_shapes(*[np.shape(grid) for grid in parameter_grids.values()])
+        profiler = me_calculator_profiling.profiler
+        start = perf_counter() if profiler is not None else 0.
+        if self.workers != 1 and np.prod(shape) > 1:
+            values = evaluate_tiles(self.functions, plottables, inputs, shape, executor=self.executor, workers=self.workers)
+        else:
+            values = evaluate_tile(self.functions, plottables, inputs, shape)
+        if profiler is not None:
+            profiler.record_time("evaluation", ",".join(plottables), perf_counter() - start)
+            for plottable, value in zip(plottables, values):
+                profiler.record_evaluation(plottable, value.size, value.size - np.count_nonzero(np.isfinite(value)))
+        return values
+
+
+@plottable_registry
 class MeCalculatorFunctions:
-    def __init__(self, cost_per_point=0.01, discount_per_point=0.0025, closing_costs=0.06, escrow_rate=None, property_value_growth_rate=0., pmi_insurance=0.000075, price_to_rent_ratio=20., market_rate_of_return=0.07):
+    # Every method accepts either floats or NumPy arrays (broadcast against each other).
+    # Points out of the domain of a plottable (e.g. time > duration) are returned as NaN, nothing raises;
+    # valid() tells which points are in domain without evaluating the plottable.
+    # The formulas live in MeCalculatorScenario: use scenario() directly to evaluate several plottables of the
+    # same inputs while computing their shared intermediates once.
+    # Methods decorated with @plottable_method (me_calculator_decorators.plottable, renamed here so that loops over
+    # plottable names do not shadow it) are registered in MeCalculatorFunctions.plottables (arguments, units, domain,
+    # and the constructor arguments, or knobs, the formulas read).
+    # Domain constraints: "amortizing" (payment net of escrow exceeds the yearly interest), "within_duration"
+    # (time <= mortgage duration) and "solvable_rate" (a positive interest rate repays the principal).
+    def __init__(self, cost_per_point=0.01, discount_per_point=0.0025, closing_costs=0.06, escrow_rate=None, property_value_growth_rate=0., pmi_insurance=0.000075, price_to_rent_ratio=20., market_rate_of_return=0.07, interest_rate_tolerance=1e-10):
         self.cost_per_point = cost_per_point
         self.discount_per_point = discount_per_point
         self.closing_costs = closing_costs
@@ -154,180 +294,114 @@ class MeCalculatorFunctions:
         self.pmi_insurance = pmi_insurance
         self.price_to_rent_ratio = price_to_rent_ratio
         self.market_rate_of_return = market_rate_of_return
+        self.interest_rate_tolerance = interest_rate_tolerance
+
+    def scenario(self, **inputs):
+        return MeCalculatorScenario(self, **inputs)
+
+    def evaluate(self, plottable, *args):
+        # Dispatch through the registry built at class creation (see plottable_registry)
+        return self.plottables[plottable].function(self, *args)
+
+    def jacobian(self, plottable, *args, with_respect_to=None):
+        # Same arguments as the plottable; returns its value and a dict argument -> derivative for the arguments in
+        # with_respect_to (all by default), computed together in one forward-mode pass (see me_calculator_derivatives)
+        return me_calculator_derivatives.jacobian(self, plottable, dict(zip(self.plottables[plottable].arguments, args)), with_respect_to)
+
+    def valid(self, plottable, *args):
+        # Same arguments as the plottable; True (a boolean array for array arguments) inside its declared domain
+        return self.scenario(**dict(zip(self.plottables[plottable].arguments, args))).valid(plottable)
 
+    @plottable_method(" [$]", knobs=("escrow_rate",))
     def mortgage_payment(self, downpayment, mortgage_duration, mortgage_principal, mortgage_interest_rate):
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        base = 1. + mortgage_interest_rate
-        return mortgage_interest_rate * mortgage_principal * pow(base, mortgage_duration) / (pow(base, mortgage_duration) - 1.) + escrow_expenses
+        return self.scenario(downpayment=downpayment, mortgage_duration=mortgage_duration, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate).value("mortgage_payment")
 
+    @plottable_method(" [$]", knobs=("escrow_rate",))
     def mortgage_principal(self, downpayment, mortgage_payment, mortgage_duration, mortgage_interest_rate):
-        escrow_rate = self.escrow_rate if self.include_escrow_expenses else 0.
-        base = 1. + mortgage_interest_rate
-        base_n = pow(base, mortgage_duration)
-        a = (base_n - 1.) / mortgage_interest_rate
-        b = 1. / (1. - downpayment)
-        return mortgage_payment * a / (base_n + b * a * escrow_rate)
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_duration=mortgage_duration, mortgage_interest_rate=mortgage_interest_rate).value("mortgage_principal")
 
+    @plottable_method(" [fraction of principal]", domain=("solvable_rate",), knobs=("escrow_rate", "interest_rate_tolerance"))
     def mortgage_interest_rate(self, downpayment, mortgage_payment, mortgage_duration, mortgage_principal):
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        corrected_payment = mortgage_payment - escrow_expenses
-        for interest_step in range(1, 20000):
-            interest = interest_step * 0.001
-            base = 1. + interest
-            base_n = pow(base, mortgage_duration)
-            a = (base_n - 1.) / interest
-            if mortgage_principal * base_n - corrected_payment * a > 0.:
-                return interest
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_duration=mortgage_duration, mortgage_principal=mortgage_principal).value("mortgage_interest_rate")
 
+    @plottable_method(" [years]", domain=("amortizing",), knobs=("escrow_rate",))
     def mortgage_duration(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate):
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        corrected_payment = mortgage_payment - escrow_expenses
-        return log(corrected_payment / (corrected_payment - mortgage_interest_rate * mortgage_principal)) / log(1. + mortgage_interest_rate)
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate).value("mortgage_duration")
 
+    @plottable_method(" [$]", domain=("amortizing",), knobs=("escrow_rate",))
     def mortgage_interest(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate):
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        corrected_payment = mortgage_payment - escrow_expenses
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        return corrected_payment * duration - mortgage_principal 
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate).value("mortgage_interest")
 
+    @plottable_method(" [$]", domain=("amortizing",), knobs=("escrow_rate",))
     def mortgage_escrow(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        return duration * escrow_expenses
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate).value("mortgage_escrow")
 
     def mortgage_no_closing(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        return duration * mortgage_payment
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate).value("mortgage_no_closing")
 
     def mortgage_with_closing(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate):
-        return self.closing_costs * mortgage_principal + self.mortgage_no_closing(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate).value("mortgage_with_closing")
 
+    @plottable_method(" [$]", domain=("amortizing",), knobs=("closing_costs", "escrow_rate"))
     def total_cost(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate):
-        home_price = mortgage_principal / (1. - downpayment)
-        return downpayment * home_price + self.mortgage_with_closing(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate).value("total_cost")
 
+    @plottable_method(" [$]")
     def property_value(self, downpayment, mortgage_principal, property_value_growth_rate, time):
-        home_price = mortgage_principal / (1. - downpayment)
-        return (downpayment * home_price + mortgage_principal) * pow(1. + property_value_growth_rate, time)
+        return self.scenario(downpayment=downpayment, mortgage_principal=mortgage_principal, property_value_growth_rate=property_value_growth_rate, time=time).value("property_value")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("escrow_rate",))
     def mortgage_principal_residual(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        corrected_payment = mortgage_payment - escrow_expenses
-        base = 1. + mortgage_interest_rate
-        base_n = pow(base, time)
-        return mortgage_principal * base_n - corrected_payment * (base_n - 1.) / mortgage_interest_rate
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("mortgage_principal_residual")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("escrow_rate",))
     def mortgage_principal_paid(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        residual_principal = self.mortgage_principal_residual(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
-        return mortgage_principal - residual_principal
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("mortgage_principal_paid")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("escrow_rate",))
     def mortgage_interest_residual(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        residual_principal = self.mortgage_principal_residual(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        mortgage_total = duration * (mortgage_payment - escrow_expenses)
-        amount_paid_to_date = time * (mortgage_payment - escrow_expenses)
-        residual_interest = mortgage_total - amount_paid_to_date - residual_principal
-        return residual_interest
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("mortgage_interest_residual")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("escrow_rate",))
     def mortgage_interest_paid(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        interest = self.mortgage_interest(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        interest_residual = self.mortgage_interest_residual(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
-        return interest - interest_residual 
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("mortgage_interest_paid")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("escrow_rate",))
     def mortgage_escrow_residual(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        return (duration - time) * escrow_expenses
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("mortgage_escrow_residual")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("escrow_rate",))
     def mortgage_escrow_paid(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        home_price = mortgage_principal / (1. - downpayment)
-        escrow_expenses = self.escrow_rate * home_price if self.include_escrow_expenses else 0.
-        return time * escrow_expenses
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("mortgage_escrow_paid")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("escrow_rate",))
     def mortgage_residual(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        return (duration - time) * mortgage_payment
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("mortgage_residual")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("escrow_rate",))
     def mortgage_paid(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        return time * mortgage_payment
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("mortgage_paid")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("closing_costs", "escrow_rate"))
     def total_cost_residual(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        return self.total_cost(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate) - \
-               self.total_cost_paid(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("total_cost_residual")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("closing_costs", "escrow_rate"))
     def total_cost_paid(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        duration = self.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
-        if time > duration:
-            raise ValueError
-        home_price = mortgage_principal / (1. - downpayment)
-        return downpayment * home_price + self.mortgage_with_closing(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("total_cost_paid")
 
+    @plottable_method(" [$]", knobs=("closing_costs",))
     def accrued_costs(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        home_price = mortgage_principal / (1. - downpayment)
-        return downpayment * home_price + self.closing_costs * home_price + time * mortgage_payment
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("accrued_costs")
 
+    @plottable_method(" [$]", knobs=("closing_costs", "property_value_growth_rate"))
     def home_purchase_total_return(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        return self.property_value(downpayment, mortgage_principal, self.property_value_growth_rate, time) * (1. - self.closing_costs)
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("home_purchase_total_return")
 
+    @plottable_method(" [$]", domain=("amortizing", "within_duration"), knobs=("closing_costs", "escrow_rate", "property_value_growth_rate"))
     def home_purchase_net_return(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        return self.home_purchase_total_return(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time) - \
-               self.mortgage_principal_residual(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("home_purchase_net_return")
 
+    @plottable_method(" [$]", knobs=("closing_costs", "market_rate_of_return", "price_to_rent_ratio", "property_value_growth_rate"))
     def no_home_purchase_total_return(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
-        home_price = mortgage_principal / (1. - downpayment)
-        rent = self.property_value(0., home_price / self.price_to_rent_ratio, self.property_value_growth_rate, time)
-        initial_capital = downpayment * home_price + self.closing_costs * home_price  # Downpayment + closing cost
-        yearly_capital_to_invest = mortgage_payment - rent  # Cash available for investment after rent is paid
-        base = 1. + self.market_rate_of_return
-        base_n = pow(base, time)
-        return_from_initial_capital = initial_capital * pow(base, time)
-        return_from_yearly_investment = yearly_capital_to_invest * (base / self.market_rate_of_return) * (base_n - 1.)
-        return return_from_initial_capital + return_from_yearly_investment 
-
-calculator = MeCalculator(points=0.,
-                          cost_per_point=0.01,
-                          discount_per_point=0.025,
-                          downpayment=0.2,
-                          closing_costs=0.06,
-                          mortgage_payment=76000,
-                          mortgage_duration=30.,
-                          mortgage_principal=1200000,
-                          mortgage_interest_rate=0.03,
-                          escrow_rate=0.02,
-                          property_value_growth_rate=0.07,
-                          pmi_insurance=0.000075,
-                          price_to_rent_ratio=32,
-                          market_rate_of_return=0.07)
-#calculator.plot_1d("time", ["mortgage_principal_paid", "mortgage_interest_paid", "mortgage_escrow_paid", "mortgage_paid", "accrued_costs", "home_purchase_net_return", "no_home_purchase_total_return"])
-#calculator.plot_1d("mortgage_duration", ["mortgage_payment"])
-#calculator.plot_2d("mortgage_principal", "time", "mortgage_interest_paid")
+        return self.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal, mortgage_interest_rate=mortgage_interest_rate, time=time).value("no_home_purchase_total_return")
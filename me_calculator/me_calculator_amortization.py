@@ -0,0 +1,69 @@
+from collections import namedtuple
+
+import numpy as np
+
+
+class AmortizationSchedule(namedtuple("AmortizationSchedule", ["payment", "principal", "interest", "escrow", "balance", "closing_costs"])):
+    # payment, principal, interest, escrow and balance (after the payment) are (loans x periods) arrays,
+    # zero after the end of each loan; closing_costs is paid upfront, one value per loan.
+
+    def as_structured(self):
+        schedule = np.zeros(self.balance.shape, dtype=[(field, self.balance.dtype) for field in ("payment", "principal", "interest", "escrow", "balance")])
+        for field in ("payment", "principal", "interest", "escrow", "balance"):
+            schedule[field] = getattr(self, field)
+        return schedule
+
+
+def amortization_schedule(functions, downpayment, mortgage_principal, mortgage_interest_rate, mortgage_duration, periods_per_year=12, dtype=np.float64):
+    # Periodic schedule of N fixed-rate loans at once (arguments broadcast to one value per loan).
+    # The yearly interest rate is compounded periods_per_year times a year; escrow and closing costs
+    # come from the MeCalculatorFunctions configuration.
+    downpayment, principal, interest_rate, duration = [np.ravel(argument) for argument in np.broadcast_arrays(
+        np.asarray(downpayment, dtype=float), np.asarray(mortgage_principal, dtype=float),
+        np.asarray(mortgage_interest_rate, dtype=float), np.asarray(mortgage_duration, dtype=float))]
+    periods = np.rint(duration * periods_per_year).astype(int)
+    period = np.arange(1, periods.max() + 1, dtype=float)
+    ending = periods[:, None]
+    active = period <= ending
+    rate = (interest_rate / periods_per_year)[:, None]
+    principal = principal[:, None]
+    amortizing = rate[:, 0] > 0.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Level payment and closed-form balance after each payment: principal * g^k - payment * (g^k - 1) / rate,
+        # evaluated in place as g^k * (principal - payment / rate) + payment / rate. Zero rate loans repay linearly.
+        payment = np.where(amortizing[:, None], principal * rate / -np.expm1(-ending * np.log1p(rate)), principal / ending)
+        balance = np.multiply(period, np.log1p(rate))
+        np.exp(balance, out=balance)
+        annuity_value = payment / rate
+        balance *= principal - annuity_value
+        balance += annuity_value
+    if not amortizing.all():
+        balance[~amortizing] = principal[~amortizing] - payment[~amortizing] * period
+    # The last payment clears the loan exactly
+    np.maximum(balance, 0., out=balance)
+    balance[period >= ending] = 0.
+    previous_balance = np.empty_like(balance)
+    previous_balance[:, 0] = principal[:, 0]
+    previous_balance[:, 1:] = balance[:, :-1]
+    previous_balance[~active] = 0.
+    interest = previous_balance * rate
+    principal_paid = np.subtract(previous_balance, balance, out=previous_balance)
+    home_price = principal / (1. - downpayment[:, None])
+    escrow_rate = functions.escrow_rate if functions.include_escrow_expenses else 0.
+    escrow = active * (escrow_rate * home_price / periods_per_year)
+    return AmortizationSchedule(payment=(principal_paid + interest + escrow).astype(dtype),
+                                principal=principal_paid.astype(dtype),
+                                interest=interest.astype(dtype),
+                                escrow=escrow.astype(dtype),
+                                balance=balance.astype(dtype),
+                                closing_costs=(functions.closing_costs * principal[:, 0]).astype(dtype))
+
+
+def amortization_schedule_chunks(functions, downpayment, mortgage_principal, mortgage_interest_rate, mortgage_duration, periods_per_year=12, dtype=np.float64, chunk_size=50000):
+    # Yields (first loan index, AmortizationSchedule) for consecutive blocks of chunk_size loans,
+    # so the temporaries of large loan books stay bounded by the chunk size
+    arguments = [np.ravel(argument) for argument in np.broadcast_arrays(np.asarray(downpayment, dtype=float), np.asarray(mortgage_principal, dtype=float),
+                                                                        np.asarray(mortgage_interest_rate, dtype=float), np.asarray(mortgage_duration, dtype=float))]
+    for start in range(0, len(arguments[0]), chunk_size):
+        chunk = [argument[start:start + chunk_size] for argument in arguments]
+        yield start, amortization_schedule(functions, *chunk, periods_per_year=periods_per_year, dtype=dtype)
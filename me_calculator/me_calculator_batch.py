@@ -0,0 +1,194 @@
+import csv
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from itertools import islice
+
+import numpy as np
+
+from me_calculator import me_calculator_profiling
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_errors import UnknownPlottable
+from me_calculator.me_calculator_export import MeCalculatorExport, plain_units
+from me_calculator.me_calculator_parallel import create_executor, ordered_map
+
+# CSV columns read as plottable arguments and as MeCalculatorFunctions constructor arguments
+# (property_value_growth_rate is both, like in MeCalculator)
+input_columns = ("downpayment", "mortgage_payment", "mortgage_duration", "mortgage_principal", "mortgage_interest_rate", "property_value_growth_rate", "time")
+constructor_columns = ("cost_per_point", "discount_per_point", "closing_costs", "escrow_rate", "property_value_growth_rate", "pmi_insurance", "price_to_rent_ratio", "market_rate_of_return")
+
+# MeCalculatorFunctions constructor defaults, for the missing values of constructor columns
+constructor_defaults = {name: parameter.default for name, parameter in inspect.signature(MeCalculatorFunctions).parameters.items()}
+
+BatchReport = namedtuple("BatchReport", ["rows", "seconds", "rows_per_second"])
+
+
+class MeCalculatorFunctionsCache:
+    # MeCalculatorFunctions instances per configuration (constructor arguments), keeping the max_size most recently
+    # used ones. In configurations NaN is a missing value: a missing escrow_rate means no escrow expenses, other
+    # missing values take the values of defaults, then the MeCalculatorFunctions defaults.
+    def __init__(self, defaults=None, max_size=256):
+        self.defaults = dict(defaults or {})
+        self.max_size = max_size
+        self.instances = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.instances)
+
+    def __getstate__(self):
+        # Pickled with the batch for process executors, without the lock
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get(self, knobs):
+        arguments = self.arguments(knobs)
+        key = tuple(sorted(arguments.items()))
+        with self.lock:
+            functions = self.instances.get(key)
+            if functions is None:
+                functions = self.instances[key] = MeCalculatorFunctions(**arguments)
+                if len(self.instances) > self.max_size:
+                    self.instances.popitem(last=False)
+            else:
+                self.instances.move_to_end(key)
+        return functions
+
+    def arguments(self, knobs):
+        arguments = dict(self.defaults)
+        for name, value in knobs.items():
+            if np.isfinite(value):
+                arguments[name] = value
+            elif name == "escrow_rate":
+                arguments[name] = None
+        return arguments
+
+    def for_columns(self, columns):
+        # The MeCalculatorFunctions of rows given as columns (name -> 1d array): columns constant over the rows are
+        # configured as floats, from the cache; columns that vary are passed as arrays, which the formulas broadcast
+        # against the inputs, so any mix of configurations is evaluated in one vectorized pass
+        knobs, varying = {}, {}
+        for name in constructor_columns:
+            if name not in columns:
+                continue
+            column = columns[name]
+            missing = np.isnan(column)
+            if missing.all():
+                knobs[name] = np.nan
+            elif not missing.any() and (column == column[0]).all():
+                knobs[name] = float(column[0])
+            else:
+                varying[name] = (column, missing)
+        if not varying:
+            return self.get(knobs)
+        arguments = self.arguments(knobs)
+        for name, (column, missing) in varying.items():
+            # Without escrow is the same as a zero escrow rate
+            fill = 0. if name == "escrow_rate" else arguments.get(name, constructor_defaults[name])
+            arguments[name] = np.where(missing, fill, column)
+        return MeCalculatorFunctions(**arguments)
+
+
+class MeCalculatorBatch:
+    # Evaluates plottables for scenario rows, one chunk of rows at a time, each chunk in one vectorized call:
+    # constructor arguments that vary between rows are evaluated as arrays (see MeCalculatorFunctionsCache.for_columns).
+    # Constructor arguments missing from the rows take the values of defaults, then the MeCalculatorFunctions defaults.
+    # With workers != 1 chunks are evaluated in parallel by the executor ("thread", "process" or a concurrent.futures.Executor).
+    def __init__(self, plottables, chunk_size=10000, defaults=None, workers=1, executor="thread"):
+        for plottable in plottables:
+            if plottable not in MeCalculatorFunctions.plottables:
+                raise UnknownPlottable(plottable)
+        self.plottables = list(plottables)
+        self.chunk_size = chunk_size
+        self.functions = MeCalculatorFunctionsCache(defaults)
+        self.workers = workers
+        self.executor = executor
+
+    def evaluate_columns(self, columns, configuration=None):
+        # columns: name -> 1d array (one value per row); returns the plottable values, one 1d array per plottable.
+        # The constructor arguments are read from configuration (same layout) if given, else from columns as well
+        # (in CSV rows property_value_growth_rate is both an argument and a constructor argument).
+        profiler = me_calculator_profiling.profiler
+        if profiler is None:
+            return self._evaluate_columns(columns, configuration)
+        with profiler.section("evaluation", "batch"):
+            results = self._evaluate_columns(columns, configuration)
+        for plottable, result in zip(self.plottables, results):
+            profiler.record_evaluation(plottable, result.size, result.size - np.count_nonzero(np.isfinite(result)))
+        return results
+
+    def _evaluate_columns(self, columns, configuration=None):
+        rows = len(next(iter(columns.values())))
+        functions = self.functions.for_columns(configuration if configuration is not None else columns)
+        inputs = {name: columns[name] for name in input_columns if name in columns}
+        with np.errstate(all="ignore"):
+            values = functions.scenario(**inputs).evaluate(self.plottables)
+        return [np.array(np.broadcast_to(value, (rows,)), dtype=float) for value in values]
+
+    def evaluate_csv(self, input_file, output_file):
+        # Streams rows from input_file and writes them back with one extra column per plottable
+        start = time.perf_counter()
+        reader = csv.reader(input_file)
+        header = next(reader)
+        writer = csv.writer(output_file, lineterminator="\n")
+        writer.writerow(header + self.plottables)
+        rows = 0
+        for chunk, _, values in self._results(self._read_chunks(reader, header)):
+            writer.writerows(row + [repr(float(value)) for value in row_values] for row, row_values in zip(chunk, zip(*values)))
+            rows += len(chunk)
+        seconds = time.perf_counter() - start
+        return BatchReport(rows, seconds, rows / seconds if seconds > 0. else float("inf"))
+
+    def evaluate_csv_to_npz(self, input_file, path, dtype=np.float64, compress=False):
+        # Same as evaluate_csv, but writes the numeric input columns and the plottables as the columns of an .npz
+        # (see MeCalculatorExport), chunk by chunk; other CSV columns are left out
+        start = time.perf_counter()
+        reader = csv.reader(input_file)
+        header = next(reader)
+        metadata = {"kind": "batch",
+                    "inputs": [name for name in header if name in input_columns + constructor_columns],
+                    "plottables": {plottable: plain_units(MeCalculatorFunctions.plottables[plottable].units) for plottable in self.plottables}}
+        rows = 0
+        with MeCalculatorExport(path, dtype, metadata, compress) as export:
+            for chunk, columns, values in self._results(self._read_chunks(reader, header)):
+                export.append(columns)
+                export.append(dict(zip(self.plottables, values)))
+                rows += len(chunk)
+        seconds = time.perf_counter() - start
+        return BatchReport(rows, seconds, rows / seconds if seconds > 0. else float("inf"))
+
+    def _results(self, chunks):
+        # (rows, columns, plottable values) of every chunk, in order
+        if self.workers == 1:
+            for chunk, columns in chunks:
+                yield _evaluate_chunk(self, chunk, columns)
+            return
+        pool = create_executor(self.executor, self.workers)
+        try:
+            yield from ordered_map(pool, _evaluate_chunk, ((self, chunk, columns) for chunk, columns in chunks), 2 * (self.workers or os.cpu_count()))
+        finally:
+            if pool is not self.executor:
+                pool.shutdown()
+
+    def _read_chunks(self, reader, header):
+        while True:
+            chunk = list(islice(reader, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk, {name: np.array([_to_float(row[i]) for row in chunk]) for i, name in enumerate(header) if name in input_columns + constructor_columns}
+
+
+def _evaluate_chunk(batch, chunk, columns):
+    return chunk, columns, batch.evaluate_columns(columns)
+
+
+def _to_float(value):
+    # Empty cells are missing values (e.g. no escrow)
+    return float(value) if value.strip() else np.nan
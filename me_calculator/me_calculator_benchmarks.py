@@ -0,0 +1,102 @@
+import json
+import platform
+import timeit
+
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculator, MeCalculatorFunctions
+
+# Reference scenario of the benchmarks
+scenario = {"downpayment": 0.2, "mortgage_payment": 76000., "mortgage_duration": 30., "mortgage_principal": 1200000.,
+            "mortgage_interest_rate": 0.03, "property_value_growth_rate": 0.07, "time": 10.}
+interest_rates = (0.01, 0.05, 0.15, 0.4)
+
+
+def benchmark_calculator():
+    return MeCalculator(points=0., cost_per_point=0.01, discount_per_point=0.025, downpayment=0.2, closing_costs=0.06,
+                        mortgage_payment=76000, mortgage_duration=30., mortgage_principal=1200000, mortgage_interest_rate=0.03,
+                        escrow_rate=0.02, property_value_growth_rate=0.07, pmi_insurance=0.000075, price_to_rent_ratio=32,
+                        market_rate_of_return=0.07)
+
+
+def benchmarks(batch_size=100000, resolution=1000):
+    # name -> callable timed by run_benchmarks
+    calculator = benchmark_calculator()
+    functions = calculator.functions
+    random = np.random.default_rng(0)
+    batch = dict(scenario)
+    batch["mortgage_payment"] = random.uniform(60000., 100000., batch_size)
+    batch["time"] = random.uniform(0., 30., batch_size)
+    cases = {}
+    for name, registered in MeCalculatorFunctions.plottables.items():
+        scalar_arguments = [scenario[argument] for argument in registered.arguments]
+        batch_arguments = [batch[argument] for argument in registered.arguments]
+        if name == "mortgage_interest_rate":
+            batch_arguments[1] = functions.mortgage_payment(0.2, 30., 1200000., random.uniform(0.005, 0.3, batch_size))
+        cases["scalar." + name] = _bind(registered.function, functions, scalar_arguments)
+        cases["batch." + name] = _bind(registered.function, functions, batch_arguments)
+    for interest_rate in interest_rates:
+        payment = functions.mortgage_payment(0.2, 30., 1200000., interest_rate)
+        cases["mortgage_interest_rate.{:g}".format(interest_rate)] = _bind(MeCalculatorFunctions.mortgage_interest_rate, functions, [0.2, payment, 30., 1200000.])
+    cases["data_1d.mortgage_interest_paid"] = lambda: calculator.data_1d("time", "mortgage_interest_paid", resolution=resolution)
+    plot_1d = ["mortgage_principal_paid", "mortgage_interest_paid", "mortgage_escrow_paid", "mortgage_paid", "accrued_costs", "home_purchase_net_return",
+               "no_home_purchase_total_return"]
+    cases["data_1d_plottables.plot_1d"] = lambda: calculator.data_1d_plottables("time", plot_1d, resolution=resolution)
+    cases["data_2d.mortgage_interest_paid"] = lambda: calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=resolution)
+    return cases
+
+
+def run_benchmarks(batch_size=100000, resolution=1000, repeat=5, min_time=0.05, names=None):
+    # Best time per call (seconds) of every benchmark, with the environment it ran in.
+    # Each repetition makes enough calls to last at least min_time.
+    results = {}
+    for name, function in benchmarks(batch_size, resolution).items():
+        if names is not None and name not in names:
+            continue
+        timer = timeit.Timer(function)
+        number = 1
+        while True:
+            elapsed = timer.timeit(number)
+            if elapsed >= min_time:
+                break
+            number *= 10 if elapsed < min_time / 10. else 2
+        results[name] = min([elapsed] + timer.repeat(repeat=repeat - 1, number=number)) / number
+    return {"benchmarks": results,
+            "parameters": {"batch_size": batch_size, "resolution": resolution, "repeat": repeat, "min_time": min_time},
+            "python": platform.python_version(),
+            "numpy": np.__version__}
+
+
+def find_regressions(results, baseline, threshold=0.2, names=None):
+    # Benchmarks slower than the baseline by more than threshold (a fraction): name -> (baseline, current, ratio), and
+    # benchmarks of the baseline (among names, if given) missing from results: name -> (baseline, None, None).
+    # Raises ValueError if the two runs were not made with the same sizes, their times are then not comparable.
+    sizes = ("batch_size", "resolution")
+    current_sizes = [results.get("parameters", {}).get(size) for size in sizes]
+    baseline_sizes = [baseline.get("parameters", {}).get(size) for size in sizes]
+    if current_sizes != baseline_sizes:
+        raise ValueError("the baseline ran with {}, not {}".format(", ".join("{}={}".format(size, value) for size, value in zip(sizes, baseline_sizes)),
+                                                                   ", ".join("{}={}".format(size, value) for size, value in zip(sizes, current_sizes))))
+    regressions = {}
+    for name, reference in baseline["benchmarks"].items():
+        if name not in results["benchmarks"] and (names is None or name in names):
+            regressions[name] = (reference, None, None)
+    for name, seconds in results["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if reference and seconds > reference * (1. + threshold):
+            regressions[name] = (reference, seconds, seconds / reference)
+    return regressions
+
+
+def save_results(results, path):
+    with open(path, "w") as output_file:
+        json.dump(results, output_file, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as input_file:
+        return json.load(input_file)
+
+
+def _bind(function, functions, arguments):
+    return lambda: function(functions, *arguments)
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+class MeCalculatorCache:
+    # On-disk cache of computed grids, one .npy file per key in directory, loaded memory-mapped (read-only, no copy).
+    # Files are written to a temporary name and renamed into place, so concurrent readers (other threads or
+    # processes sharing the directory) only ever see complete files. Once the files exceed max_bytes, the least
+    # recently used ones are removed; a reader that has a removed file mapped keeps its data (POSIX).
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(**parts):
+        # sha256 of the parts (anything JSON serializable, NumPy scalars included), independent of their order
+        description = json.dumps(parts, sort_keys=True, default=float)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            values = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Not cached, or removed by another process in the meantime
+            self.misses += 1
+            return None
+        self.hits += 1
+        return values
+
+    def put(self, key, values):
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as output_file:
+                np.save(output_file, np.ascontiguousarray(values))
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        self._evict()
+
+    def get_or_compute(self, key, compute):
+        values = self.get(key)
+        if values is None:
+            values = compute()
+            self.put(key, values)
+        return values
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def clear(self):
+        for entry in self._entries():
+            _remove(entry.path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npy")
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".npy")]
+
+    def _evict(self):
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+def _remove(path):
+    # Another process may have removed it already; on Windows a mapped file cannot be removed and stays for now
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
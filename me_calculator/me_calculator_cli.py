@@ -0,0 +1,98 @@
+import argparse
+import sys
+
+from me_calculator.me_calculator_batch import MeCalculatorBatch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="me-calculator", description="Mortgage calculator")
+    subparsers = parser.add_subparsers(dest="command")
+    batch_parser = subparsers.add_parser("batch", help="evaluate plottables for every scenario row of a CSV file")
+    batch_parser.add_argument("input", help="input CSV file with a header row ('-' for stdin)")
+    batch_parser.add_argument("output", help="output CSV file ('-' for stdout), or .npz file for a columnar export")
+    batch_parser.add_argument("-p", "--plottables", nargs="+", required=True, help="plottables to evaluate")
+    batch_parser.add_argument("--chunk-size", type=int, default=10000, help="rows evaluated at once")
+    batch_parser.add_argument("--workers", type=int, default=1, help="chunks evaluated in parallel (0 for all cores)")
+    batch_parser.add_argument("--executor", choices=["thread", "process"], default="thread", help="parallel executor")
+    batch_parser.add_argument("--float32", action="store_true", help="store .npz columns as float32")
+    bench_parser = subparsers.add_parser("bench", help="time the computational core and the sweeps, optionally against a baseline")
+    bench_parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    bench_parser.add_argument("-b", "--baseline", help="JSON results of a run with the same sizes to compare with; exits with 1 on regressions or missing benchmarks")
+    bench_parser.add_argument("-t", "--threshold", type=float, default=0.2, help="allowed slowdown over the baseline (fraction)")
+    bench_parser.add_argument("--quick", action="store_true", help="smaller batches and grids")
+    bench_parser.add_argument("--only", nargs="+", help="benchmarks to run")
+    serve_parser = subparsers.add_parser("serve", help="serve plottable evaluations and sweeps as JSON over HTTP")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    serve_parser.add_argument("--window", type=float, default=0.002, help="seconds concurrent evaluations wait to be batched together")
+    serve_parser.add_argument("--max-batch", type=int, default=10000, help="evaluations batched at most")
+    arguments = parser.parse_args(argv)
+    if arguments.command == "batch":
+        return _batch(arguments)
+    if arguments.command == "bench":
+        return _bench(arguments)
+    if arguments.command == "serve":
+        return _serve(arguments)
+    parser.print_help()
+    return 2
+
+
+def _batch(arguments):
+    batch = MeCalculatorBatch(arguments.plottables, chunk_size=arguments.chunk_size, workers=arguments.workers or None, executor=arguments.executor)
+    input_file = sys.stdin if arguments.input == "-" else open(arguments.input, newline="")
+    try:
+        if arguments.output.endswith(".npz"):
+            report = batch.evaluate_csv_to_npz(input_file, arguments.output, dtype="float32" if arguments.float32 else "float64")
+        else:
+            output_file = sys.stdout if arguments.output == "-" else open(arguments.output, "w", newline="")
+            try:
+                report = batch.evaluate_csv(input_file, output_file)
+            finally:
+                if output_file is not sys.stdout:
+                    output_file.close()
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+    sys.stderr.write("{} rows in {:.3f} s ({:.0f} rows/s)\n".format(report.rows, report.seconds, report.rows_per_second))
+    return 0
+
+
+def _bench(arguments):
+    from me_calculator import me_calculator_benchmarks
+    if arguments.quick:
+        results = me_calculator_benchmarks.run_benchmarks(batch_size=10000, resolution=200, repeat=3, min_time=0.01, names=arguments.only)
+    else:
+        results = me_calculator_benchmarks.run_benchmarks(names=arguments.only)
+    if arguments.output:
+        me_calculator_benchmarks.save_results(results, arguments.output)
+    regressions = {}
+    if arguments.baseline:
+        try:
+            regressions = me_calculator_benchmarks.find_regressions(results, me_calculator_benchmarks.load_results(arguments.baseline), arguments.threshold, arguments.only)
+        except ValueError as error:
+            sys.stderr.write("cannot compare with {}: {}\n".format(arguments.baseline, error))
+            return 1
+    for name, seconds in sorted(results["benchmarks"].items()):
+        line = "{:<50} {:>12.3e} s".format(name, seconds)
+        if name in regressions:
+            line += "  REGRESSION x{:.2f}".format(regressions[name][2])
+        sys.stdout.write(line + "\n")
+    for name in sorted(name for name, regression in regressions.items() if regression[1] is None):
+        sys.stdout.write("{:<50} {:>14}  MISSING\n".format(name, "-"))
+    return 1 if regressions else 0
+
+
+def _serve(arguments):
+    import asyncio
+    from me_calculator.me_calculator_server import MeCalculatorServer
+    server = MeCalculatorServer(arguments.host, arguments.port, window=arguments.window, max_batch=arguments.max_batch)
+    sys.stderr.write("serving on http://{}:{}\n".format(arguments.host, arguments.port))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,83 @@
 import inspect
+from collections import namedtuple
+from time import perf_counter
+from me_calculator import me_calculator_profiling
 from me_calculator.me_calculator_errors import UnknownParameter, UnknownPlottable, PlottableNotDependentOnParameter
 
 
+# Registry entry of a MeCalculatorFunctions plottable: argument order, units, domain constraints, the
+# MeCalculatorFunctions constructor arguments (knobs) its value depends on and the function itself
+Plottable = namedtuple("Plottable", ["name", "arguments", "units", "domain", "knobs", "function"])
+
+
+def plottable(units, domain=(), knobs=()):
+    def decorator(func):
+        func.plottable = (units, tuple(domain), tuple(knobs))
+        return func
+    return decorator
+
+
+def plottable_registry(cls):
+    # Builds cls.plottables once, at class creation, from the methods decorated with @plottable
+    cls.plottables = {}
+    for name, function in vars(cls).items():
+        if hasattr(function, "plottable"):
+            units, domain, knobs = function.plottable
+            cls.plottables[name] = Plottable(name, tuple(inspect.getfullargspec(function).args[1:]), units, domain, knobs, function)
+    return cls
+
+
 def argument_checker(func):
-    def wrapper(self, *args):
-        argument_names = inspect.getfullargspec(func).args[1:]
-        for i, argument_name in enumerate(argument_names):
+    argument_names = inspect.getfullargspec(func).args[1:]
+
+    def wrapper(self, *args, **kwargs):
+        profiler = me_calculator_profiling.profiler
+        start = perf_counter() if profiler is not None else 0.
+        arguments = dict(zip(argument_names, args))
+        arguments.update(kwargs)
+        for argument_name in argument_names:
+            if argument_name not in arguments:
+                continue
             if argument_name == "x_parameter":
-                _check_parameter(self, args[i])
+                _check_parameter(self, arguments[argument_name])
             if argument_name == "y_parameter":
-                _check_parameter(self, args[i])
+                _check_parameter(self, arguments[argument_name])
+            if argument_name == "parameters" and arguments[argument_name] is not None:
+                # None is the default of goal_seek: no grid parameters
+                _check_parameters(self, arguments[argument_name])
             if argument_name == "y_plottable":
                 if "x_parameter" not in argument_names:
                     raise KeyError
-                _check_plottable(self, args[argument_names.index("x_parameter")], args[i])
+                _check_plottable(self, arguments["x_parameter"], arguments[argument_name])
             if argument_name == "z_plottable":
                 if "x_parameter" not in argument_names or "y_parameter" not in argument_names:
                     raise KeyError
-                _check_plottable(self, args[argument_names.index("x_parameter")], args[i])
-                _check_plottable(self, args[argument_names.index("y_parameter")], args[i])
+                _check_plottable(self, arguments["x_parameter"], arguments[argument_name])
+                _check_plottable(self, arguments["y_parameter"], arguments[argument_name])
             if argument_name == "y_plottables":
                 if "x_parameter" not in argument_names:
                     raise KeyError
-                _check_plottables(self, args[argument_names.index("x_parameter")], args[i])
-        return func(self, *args)
+                _check_plottables(self, arguments["x_parameter"], arguments[argument_name])
+                # Grid parameters (goal_seek) must move at least one of the plottables
+                for parameter in arguments.get("parameters") or []:
+                    _check_parameter(self, parameter)
+                    if not any(parameter in self.functions.plottables[plottable].arguments for plottable in arguments[argument_name]):
+                        raise PlottableNotDependentOnParameter
+            if argument_name == "plottables":
+                # Sweeps of several plottables: the parameters need not be arguments of all of them
+                if not isinstance(arguments[argument_name], (list, tuple)):
+                    raise TypeError
+                for plottable in arguments[argument_name]:
+                    if plottable not in self.functions.plottables:
+                        raise UnknownPlottable
+            if argument_name == "plottable":
+                if "parameters" not in argument_names:
+                    raise KeyError
+                for parameter in arguments["parameters"]:
+                    _check_plottable(self, parameter, arguments[argument_name])
+        if profiler is not None:
+            profiler.record_time("validation", func.__name__, perf_counter() - start)
+        return func(self, *args, **kwargs)
     return wrapper
 
 
@@ -32,11 +86,18 @@ def _check_parameter(self, parameter):
         raise UnknownParameter
 
 
+def _check_parameters(self, parameters):
+    if not isinstance(parameters, (list, tuple)):
+        raise TypeError
+    for parameter in parameters:
+        _check_parameter(self, parameter)
+
+
 def _check_plottable(self, parameter, plottable):
-    if plottable not in self.mortgage_plottables:
+    registered = self.functions.plottables.get(plottable)
+    if registered is None:
         raise UnknownPlottable
-    argument_names = inspect.getfullargspec(getattr(self.functions, plottable)).args[1:]
-    if parameter not in argument_names:
+    if parameter not in registered.arguments:
         raise PlottableNotDependentOnParameter
 
 
@@ -45,3 +106,19 @@ def _check_plottables(self, parameter, plottables):
         raise TypeError
     for plottable in plottables:
         _check_plottable(self, parameter, plottable)
+
+
+def cached_intermediate(func):
+    # Read-only property computed once per object and stored in its intermediates dict
+    name = func.__name__
+
+    def wrapper(self):
+        if name not in self.intermediates:
+            profiler = me_calculator_profiling.profiler
+            if profiler is None:
+                self.intermediates[name] = func(self)
+            else:
+                with profiler.section("intermediate", name):
+                    self.intermediates[name] = func(self)
+        return self.intermediates[name]
+    return property(wrapper)
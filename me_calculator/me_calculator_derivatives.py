@@ -0,0 +1,162 @@
+import numpy as np
+
+from me_calculator.me_calculator_solvers import _annuity_payment, solve_interest_rate
+
+
+class Dual:
+    # Forward-mode dual number over NumPy arrays: a value (float or array) and its gradient with respect to n seeded
+    # inputs, stored along a trailing axis (shape of the value + (n,)) so that it broadcasts like the value.
+    # NumPy ufuncs and np.where/np.broadcast_to/np.ndim/np.shape dispatch here, so the scenario formulas run unchanged
+    # on duals and return the value and its derivatives in one pass. Comparisons and predicates act on the value.
+    def __init__(self, value, gradient):
+        self.value = value
+        self.gradient = gradient
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != "__call__" or kwargs:
+            return NotImplemented
+        if ufunc in _predicates:
+            return ufunc(*[_value(x) for x in inputs])
+        if ufunc not in _derivatives:
+            return NotImplemented
+        values = [_value(x) for x in inputs]
+        value = ufunc(*values)
+        gradient = None
+        for x, partial in zip(inputs, _derivatives[ufunc](value, *values)):
+            if isinstance(x, Dual):
+                term = x.gradient * np.asarray(partial)[..., None]
+                gradient = term if gradient is None else gradient + term
+        return Dual(value, gradient)
+
+    def __array_function__(self, function, types, args, kwargs):
+        if function is np.where:
+            condition, x, y = args
+            condition = np.asarray(_value(condition))[..., None]
+            return Dual(np.where(condition[..., 0], _value(x), _value(y)), np.where(condition, _gradient(x), _gradient(y)))
+        if function is np.broadcast_to:
+            x, shape = args[0], args[1] if len(args) > 1 else kwargs["shape"]
+            return Dual(np.broadcast_to(x.value, shape), np.broadcast_to(x.gradient, tuple(shape) + x.gradient.shape[-1:]))
+        if function in (np.ndim, np.shape):
+            return function(args[0].value)
+        return NotImplemented
+
+    def __add__(self, other):
+        return np.add(self, other)
+
+    def __radd__(self, other):
+        return np.add(other, self)
+
+    def __sub__(self, other):
+        return np.subtract(self, other)
+
+    def __rsub__(self, other):
+        return np.subtract(other, self)
+
+    def __mul__(self, other):
+        return np.multiply(self, other)
+
+    def __rmul__(self, other):
+        return np.multiply(other, self)
+
+    def __truediv__(self, other):
+        return np.true_divide(self, other)
+
+    def __rtruediv__(self, other):
+        return np.true_divide(other, self)
+
+    def __pow__(self, other):
+        return np.power(self, other)
+
+    def __rpow__(self, other):
+        return np.power(other, self)
+
+    def __neg__(self):
+        return np.negative(self)
+
+    def __gt__(self, other):
+        return np.greater(self, other)
+
+    def __ge__(self, other):
+        return np.greater_equal(self, other)
+
+    def __lt__(self, other):
+        return np.less(self, other)
+
+    def __le__(self, other):
+        return np.less_equal(self, other)
+
+    def __eq__(self, other):
+        return np.equal(self, other)
+
+    def __ne__(self, other):
+        return np.not_equal(self, other)
+
+    __hash__ = None
+
+
+def _power_derivatives(value, base, exponent):
+    # The log term is only used when the exponent is a dual (where the base is positive)
+    return exponent * np.power(base, exponent - 1.), value * np.log(np.where(base > 0., base, np.nan))
+
+
+# ufunc -> partial derivatives with respect to each input, given the result and the input values
+_derivatives = {np.add: lambda value, a, b: (1., 1.),
+                np.subtract: lambda value, a, b: (1., -1.),
+                np.multiply: lambda value, a, b: (b, a),
+                np.true_divide: lambda value, a, b: (1. / b, -value / b),
+                np.negative: lambda value, a: (-1.,),
+                np.power: _power_derivatives,
+                np.exp: lambda value, a: (value,),
+                np.expm1: lambda value, a: (value + 1.,),
+                np.log: lambda value, a: (1. / a,),
+                np.log1p: lambda value, a: (1. / (1. + a),),
+                np.sqrt: lambda value, a: (0.5 / value,)}
+_predicates = {np.greater, np.greater_equal, np.less, np.less_equal, np.equal, np.not_equal, np.isfinite, np.isnan, np.sign}
+
+
+def _value(x):
+    return x.value if isinstance(x, Dual) else x
+
+
+def _gradient(x):
+    # Constants have a zero gradient, NaN (the out of domain fill value) a NaN one
+    return x.gradient if isinstance(x, Dual) else np.asarray(x, dtype=float)[..., None] * 0.
+
+
+def seed(inputs, with_respect_to):
+    # Duals of the inputs named in with_respect_to (the others are returned as they are), each with a unit derivative
+    # with respect to itself
+    seeded = dict(inputs)
+    for i, name in enumerate(with_respect_to):
+        value = np.asarray(inputs[name], dtype=float)
+        gradient = np.zeros(value.shape + (len(with_respect_to),))
+        gradient[..., i] = 1.
+        seeded[name] = Dual(value[()], gradient)
+    return seeded
+
+
+def solve_interest_rate_dual(mortgage_payment, mortgage_principal, mortgage_duration, tolerance=1e-10):
+    # solve_interest_rate on the values, differentiated implicitly: the annuity payment at the solved rate equals the
+    # payment, so d(rate) = -d(annuity - payment) / (d annuity / d rate) with the rate held fixed
+    rate = solve_interest_rate(_value(mortgage_payment), _value(mortgage_principal), _value(mortgage_duration), tolerance=tolerance)
+    with np.errstate(all="ignore"):
+        payment, derivative = _annuity_payment(rate, mortgage_principal, mortgage_duration)
+        residual = payment - mortgage_payment
+    return Dual(rate, -residual.gradient / np.asarray(_value(derivative))[..., None])
+
+
+def jacobian(functions, plottable, arguments, with_respect_to=None):
+    # Value of the plottable and its derivatives with respect to each of with_respect_to (by default all its arguments),
+    # as a dict argument -> derivative, broadcast to the shape of the value. NaN out of domain, like the value.
+    with_respect_to = list(with_respect_to) if with_respect_to is not None else list(arguments)
+    result = functions.scenario(**seed(arguments, with_respect_to)).value(plottable)
+    if not isinstance(result, Dual):
+        # Does not depend on any of with_respect_to
+        result = Dual(result, np.zeros(np.shape(result) + (len(with_respect_to),)))
+    shape = np.broadcast_shapes(np.shape(result.value), result.gradient.shape[:-1])
+    value = _scalar(np.broadcast_to(result.value, shape))
+    return value, {name: _scalar(np.broadcast_to(result.gradient[..., i], shape)) for i, name in enumerate(with_respect_to)}
+
+
+def _scalar(value):
+    return float(value) if np.ndim(value) == 0 else value
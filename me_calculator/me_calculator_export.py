@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+from me_calculator.me_calculator_errors import UnknownPlottable
+
+metadata_key = "__metadata__"
+
+
+class _Column:
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = dtype
+        self.file = open(path, "wb")
+        self.size = 0
+
+
+class MeCalculatorExport:
+    # Writes named arrays to a standard .npz file (np.load reads it, see load_export) without keeping them in memory:
+    # append() spools each chunk to one temporary file per array, and close() assembles the .npz from those files,
+    # each member being written with its final shape (set_shape) and atomically renamed into place.
+    # Floating point data is stored as dtype (e.g. np.float32 to halve the size), other data as it is.
+    # metadata (anything JSON serializable: units, axes, ...) is stored as a JSON string under __metadata__.
+    def __init__(self, path, dtype=np.float64, metadata=None, compress=False):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.metadata = dict(metadata or {})
+        self.compress = compress
+        self.directory = tempfile.mkdtemp(prefix=".export-", dir=os.path.dirname(os.path.abspath(path)))
+        self.columns = {}
+        self.shapes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if exception_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def append(self, arrays):
+        # arrays: name -> chunk, appended (flattened, in C order) to what was written under that name before
+        for name, values in arrays.items():
+            values = np.asarray(values)
+            if name not in self.columns:
+                dtype = self.dtype if np.issubdtype(values.dtype, np.floating) else values.dtype
+                self.columns[name] = _Column(os.path.join(self.directory, str(len(self.columns))), dtype)
+            column = self.columns[name]
+            np.ascontiguousarray(values, dtype=column.dtype).tofile(column.file)
+            column.size += values.size
+
+    def set_shape(self, name, shape):
+        # Shape of the array once complete (by default 1d), e.g. the grid shape of a sweep appended slab by slab
+        self.shapes[name] = tuple(shape)
+
+    def close(self):
+        temporary_path = self.path + ".tmp"
+        try:
+            with zipfile.ZipFile(temporary_path, "w", zipfile.ZIP_DEFLATED if self.compress else zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for name, column in self.columns.items():
+                    column.file.close()
+                    shape = self.shapes.get(name, (column.size,))
+                    if int(np.prod(shape)) != column.size:
+                        raise ValueError("{} has {} values, not the {} of shape {}".format(name, column.size, int(np.prod(shape)), shape))
+                    with archive.open(name + ".npy", "w", force_zip64=True) as member, open(column.path, "rb") as data:
+                        np.lib.format.write_array_header_1_0(member, {"descr": np.lib.format.dtype_to_descr(column.dtype), "fortran_order": False, "shape": shape})
+                        shutil.copyfileobj(data, member, 1 << 20)
+                with archive.open(metadata_key + ".npy", "w") as member:
+                    np.lib.format.write_array(member, np.array(json.dumps(self.metadata, sort_keys=True)))
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.unlink(temporary_path)
+            raise
+        finally:
+            self.discard()
+
+    def discard(self):
+        for column in self.columns.values():
+            column.file.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def load_export(path):
+    # The arrays (np.load of the .npz, read lazily) and the metadata of an export
+    arrays = np.load(path)
+    return arrays, json.loads(str(arrays[metadata_key]))
+
+
+def export_sweep(calculator, path, parameters, plottables, resolution=100, ranges=None, dtype=np.float32, max_points=1 << 20, compress=False):
+    # Writes the plottables on the grid of the parameters (laid out as MeCalculator.data_nd: "ij" indexing, axes
+    # sampling [min, max) of mortgage_parameters or of ranges) to an .npz: the axes under "axes/<parameter>" and each
+    # plottable, with the grid shape, under its name. The grid is evaluated by the tiles of MeCalculator.sweep, at most
+    # max_points points at a time, which come in C order. The metadata has the axes, the fixed arguments and the units.
+    for plottable in plottables:
+        if plottable not in calculator.functions.plottables:
+            raise UnknownPlottable(plottable)
+    axes = calculator.parameter_axes(parameters, resolution, ranges)
+    shape = tuple(len(axis) for axis in axes)
+    arguments = {argument for plottable in plottables for argument in calculator.functions.plottables[plottable].arguments}
+    metadata = {"kind": "sweep",
+                "shape": shape,
+                "axes": [{"name": parameter, "units": plain_units(calculator.mortgage_parameters[parameter][3]),
+                          "range": [float(axis[0]), float(axis[-1])] if len(axis) else [], "resolution": len(axis)} for parameter, axis in zip(parameters, axes)],
+                "fixed": {argument: calculator.mortgage_parameters[argument][0] for argument in sorted(arguments) if argument not in parameters},
+                "plottables": {plottable: plain_units(calculator.mortgage_plottables[plottable][0]) for plottable in plottables},
+                "functions": vars(calculator.functions)}
+    with MeCalculatorExport(path, dtype, metadata, compress) as export:
+        for parameter, axis in zip(parameters, axes):
+            export.append({"axes/" + parameter: axis})
+        for plottable in plottables:
+            export.set_shape(plottable, shape)
+        for tile in calculator.sweep(parameters, plottables, resolution, ranges, max_points):
+            export.append(dict(zip(plottables, tile.values)))
+    return path
+
+
+def plain_units(units):
+    # " [$]" -> "$"
+    return units.strip().strip("[]")
@@ -0,0 +1,121 @@
+from collections import namedtuple
+
+import numpy as np
+
+MonteCarloResult = namedtuple("MonteCarloResult", ["years", "percentiles", "buy_percentiles", "rent_percentiles", "buy_mean", "rent_mean", "probability_buy_wins", "paths"])
+
+
+class MeCalculatorMonteCarlo:
+    # Rent-vs-buy under stochastic yearly property value growth and market returns.
+    # Both are lognormal around the property_value_growth_rate and market_rate_of_return of the
+    # MeCalculatorFunctions configuration, with the given volatilities and correlation.
+    # For every path and year t:
+    #   buy:  home_purchase_net_return, i.e. home value after closing costs minus the residual principal
+    #         (zero once the mortgage is repaid); NaN, like home_purchase_net_return, if the mortgage never amortizes
+    #   rent: no_home_purchase_total_return, i.e. downpayment and closing costs invested at t = 0, then every year
+    #         the mortgage payment minus the rent (which follows the home value) invested at the start of the year
+    # With zero volatilities both match the closed forms of MeCalculatorFunctions (up to the rent following the
+    # home value year by year instead of being fixed at its final value).
+    def __init__(self, functions, property_value_growth_volatility=0.1, market_volatility=0.15, correlation=0., seed=None, bins=4096):
+        self.functions = functions
+        self.property_value_growth_volatility = property_value_growth_volatility
+        self.market_volatility = market_volatility
+        self.correlation = correlation
+        self.seed = seed
+        self.bins = bins
+
+    def simulate(self, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, years=30, paths=100000, chunk_size=100000, percentiles=(5., 25., 50., 75., 95.)):
+        # Paths are simulated chunk_size at a time and only aggregated (means, win counts and per-year histograms
+        # for the percentiles, accurate to one bin), so memory does not grow with the number of paths.
+        # The same seed draws the same paths whatever the chunk size.
+        functions = self.functions
+        random = np.random.default_rng(self.seed)
+        time = np.arange(1, years + 1, dtype=float)
+        home_price = mortgage_principal / (1. - downpayment)
+        with np.errstate(all="ignore"):
+            scenario = functions.scenario(downpayment=downpayment, mortgage_payment=mortgage_payment, mortgage_principal=mortgage_principal,
+                                          mortgage_interest_rate=mortgage_interest_rate, time=time)
+            amortizing = bool(scenario.amortizing)
+            # Zero once the mortgage is repaid (only a mortgage that amortizes is ever repaid)
+            residual_principal = np.where(scenario.within_duration, scenario.value("mortgage_principal_residual"), 0.) if amortizing else None
+        initial_capital = downpayment * home_price + functions.closing_costs * home_price
+        buy_histogram = _StreamingHistogram(years, self.bins)
+        rent_histogram = _StreamingHistogram(years, self.bins)
+        buy_sum, rent_sum, buy_wins = np.zeros(years), np.zeros(years), np.zeros(years)
+        for start in range(0, paths, chunk_size):
+            count = min(chunk_size, paths - start)
+            growth, market = self._draw(random, count, years)
+            property_factor = np.cumprod(growth, axis=1)
+            # Rent of year t is set by the home value at the start of the year
+            rent = home_price / functions.price_to_rent_ratio * np.concatenate([np.ones((count, 1)), property_factor[:, :-1]], axis=1)
+            wealth = np.empty((count, years))
+            capital = np.full(count, float(initial_capital))
+            for year in range(years):
+                capital = (capital + mortgage_payment - rent[:, year]) * market[:, year]
+                wealth[:, year] = capital
+            rent_histogram.update(wealth)
+            rent_sum += wealth.sum(axis=0)
+            if amortizing:
+                buy = home_price * property_factor * (1. - functions.closing_costs) - residual_principal
+                buy_histogram.update(buy)
+                buy_sum += buy.sum(axis=0)
+                buy_wins += (buy > wealth).sum(axis=0)
+        percentiles = np.asarray(percentiles, dtype=float)
+        if not amortizing:
+            # The mortgage is out of domain, like home_purchase_net_return: the buy side is NaN
+            return MonteCarloResult(years=time, percentiles=percentiles,
+                                    buy_percentiles=np.full((len(percentiles), years), np.nan), rent_percentiles=rent_histogram.percentiles(percentiles),
+                                    buy_mean=np.full(years, np.nan), rent_mean=rent_sum / paths, probability_buy_wins=np.full(years, np.nan), paths=paths)
+        return MonteCarloResult(years=time, percentiles=percentiles,
+                                buy_percentiles=buy_histogram.percentiles(percentiles), rent_percentiles=rent_histogram.percentiles(percentiles),
+                                buy_mean=buy_sum / paths, rent_mean=rent_sum / paths, probability_buy_wins=buy_wins / paths, paths=paths)
+
+    def _draw(self, random, count, years):
+        # Correlated yearly growth factors (1 + rate) with the configured means
+        normal = random.standard_normal((count, years, 2))
+        growth_normal = normal[:, :, 0]
+        market_normal = self.correlation * normal[:, :, 0] + np.sqrt(1. - self.correlation * self.correlation) * normal[:, :, 1]
+        growth = _lognormal(growth_normal, self.functions.property_value_growth_rate, self.property_value_growth_volatility)
+        market = _lognormal(market_normal, self.functions.market_rate_of_return, self.market_volatility)
+        return growth, market
+
+
+def _lognormal(normal, rate, volatility):
+    # Growth factor with mean 1 + rate and log-volatility volatility
+    return np.exp(np.log1p(rate) - 0.5 * volatility * volatility + volatility * normal)
+
+
+class _StreamingHistogram:
+    # Per-year histograms; the bin range is set by the first chunk (with a margin) and later outliers
+    # are counted in the edge bins
+    def __init__(self, years, bins):
+        self.years = years
+        self.bins = bins
+        self.counts = np.zeros((years, bins))
+        self.lower = None
+        self.width = None
+
+    def update(self, values):
+        if self.lower is None:
+            lower, upper = values.min(axis=0), values.max(axis=0)
+            margin = 0.5 * (upper - lower) + 1e-9 * np.maximum(np.abs(upper), 1.)
+            self.lower = lower - margin
+            self.width = (upper + margin - self.lower) / self.bins
+        index = np.clip(((values - self.lower) / self.width).astype(int), 0, self.bins - 1)
+        index += np.arange(self.years) * self.bins
+        self.counts += np.bincount(index.ravel(), minlength=self.years * self.bins).reshape(self.years, self.bins)
+
+    def percentiles(self, percentiles):
+        # Linear interpolation inside the bin holding each percentile, one row per percentile
+        cumulative = np.cumsum(self.counts, axis=1)
+        total = cumulative[:, -1:]
+        result = np.empty((len(percentiles), self.years))
+        for i, percentile in enumerate(percentiles):
+            target = percentile / 100. * total
+            index = np.minimum((cumulative < target).sum(axis=1), self.bins - 1)
+            rows = np.arange(self.years)
+            below = np.where(index > 0, cumulative[rows, np.maximum(index - 1, 0)], 0.)
+            inside = self.counts[rows, index]
+            fraction = np.where(inside > 0., (target[:, 0] - below) / np.where(inside > 0., inside, 1.), 0.5)
+            result[i] = self.lower + (index + fraction) * self.width
+        return result
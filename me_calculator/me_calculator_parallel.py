@@ -0,0 +1,71 @@
+from collections import deque
+from concurrent.futures import Executor
+import os
+
+import numpy as np
+
+
+def create_executor(executor="thread", workers=None):
+    # executor is "thread" (the NumPy kernels release the GIL on large arrays), "process",
+    # or an existing concurrent.futures.Executor, returned as is
+    if isinstance(executor, Executor):
+        return executor
+    workers = workers or os.cpu_count()
+    if executor == "thread":
+        from concurrent.futures import ThreadPoolExecutor
+        return ThreadPoolExecutor(workers)
+    if executor == "process":
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(workers)
+    raise ValueError("executor must be 'thread', 'process' or a concurrent.futures.Executor")
+
+
+def ordered_map(executor, function, arguments, max_pending):
+    # Like Executor.map, but arguments are consumed lazily with at most max_pending tasks in flight,
+    # so memory stays bounded; results are yielded in the order of arguments
+    pending = deque()
+    for argument in arguments:
+        pending.append(executor.submit(function, *argument))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def evaluate_tile(functions, plottables, inputs, shape):
+    # Plottables of one block of the grid, broadcast to the block shape
+    with np.errstate(all="ignore"):
+        values = functions.scenario(**inputs).evaluate(plottables)
+    return [np.array(np.broadcast_to(value, shape), dtype=float) for value in values]
+
+
+def evaluate_tiles(functions, plottables, inputs, shape, executor="thread", workers=None, tiles=None):
+    # Splits the grid along its longest axis, evaluates the tiles in parallel and
+    # reassembles them in order, so the result does not depend on the scheduling
+    axis = int(np.argmax(shape))
+    workers = workers or os.cpu_count()
+    bounds = np.linspace(0, shape[axis], min(tiles or 4 * workers, shape[axis]) + 1).astype(int)
+    tile_arguments = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        tile_shape = shape[:axis] + (stop - start,) + shape[axis + 1:]
+        tile_inputs = {name: _slice_axis(value, axis, start, stop, len(shape)) for name, value in inputs.items()}
+        tile_arguments.append((functions, plottables, tile_inputs, tile_shape))
+    pool = create_executor(executor, workers)
+    try:
+        results = list(ordered_map(pool, evaluate_tile, tile_arguments, 2 * workers))
+    finally:
+        if pool is not executor:
+            pool.shutdown()
+    return [np.concatenate([result[i] for result in results], axis=axis) for i in range(len(plottables))]
+
+
+def _slice_axis(value, axis, start, stop, dimensions):
+    # Slices a grid input broadcastable to the full shape; inputs constant along the axis are left untouched
+    if np.ndim(value) == 0:
+        return value
+    axis -= dimensions - np.ndim(value)
+    if axis < 0 or np.shape(value)[axis] == 1:
+        return value
+    index = [slice(None)] * np.ndim(value)
+    index[axis] = slice(start, stop)
+    return value[tuple(index)]
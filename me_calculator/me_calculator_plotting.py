@@ -0,0 +1,66 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from me_calculator.me_calculator_rendering import build_1d, build_2d, extent, rendering, surface_resolution
+
+# Interactive plots, shown with pyplot; see me_calculator_rendering for files and bytes without a display.
+
+
+def plot_1d(calculator, x_parameter, y_plottables):
+    x, ys, valids = calculator.data_1d_plottables(x_parameter, y_plottables)
+    with rendering("plot_1d"):
+        build_1d(plt.figure(), calculator, x_parameter, y_plottables, x, ys, valids)
+    plt.show()
+
+
+def plot_2d(calculator, x_parameter, y_parameter, z_plottable):
+    # Evaluated at the level of detail of surfaces rather than at the 1000x1000 default of data_2d
+    x, y, z, valid = calculator.data_2d(x_parameter, y_parameter, z_plottable, resolution=surface_resolution(1000))
+    with rendering("plot_2d"):
+        build_2d(plt.figure(), calculator, x_parameter, y_parameter, z_plottable, x[0], y[:, 0], z, valid, "surface")
+    plt.show()
+
+
+# Session views (see me_calculator_session): the first draw creates the figure and its artists, later draws only
+# replace their data, which is much cheaper than building the plot again.
+
+def draw_view_1d(calculator, view):
+    x = view.axes[0]
+    with rendering("view_1d"):
+        if view.figure is None:
+            view.figure, ax = plt.subplots()
+            view.artists = {}
+            for i, plottable in enumerate(view.plottables):
+                view.artists[plottable], = ax.plot([], [], lw=1.5, color=calculator.plot_colors[i % len(calculator.plot_colors)],
+                                                   label=plottable + calculator.mortgage_plottables[plottable][0])
+            ax.set_xlabel(view.parameters[0] + calculator.mortgage_parameters[view.parameters[0]][3], labelpad=8)
+            ax.grid()
+            ax.legend()
+        ax = view.figure.axes[0]
+        for plottable, line in view.artists.items():
+            valid = view.valids[plottable]
+            line.set_data(x[valid], view.values[plottable][valid])
+        ax.relim()
+        ax.autoscale_view()
+        view.figure.canvas.draw_idle()
+
+
+def draw_view_2d(calculator, view):
+    # A heatmap rather than a surface: an image can take new data, a 3d surface has to be rebuilt
+    plottable = view.plottables[0]
+    valid = view.valids[plottable]
+    z = np.where(valid, view.values[plottable], np.nan)
+    with rendering("view_2d"):
+        if view.figure is None:
+            x, y = view.axes
+            view.figure, ax = plt.subplots()
+            image = ax.imshow(z, origin="lower", aspect="auto", cmap=plt.cm.coolwarm, extent=extent(x) + extent(y))
+            view.artists = {plottable: image}
+            view.figure.colorbar(image, ax=ax, label=plottable + calculator.mortgage_plottables[plottable][0])
+            ax.set_xlabel(view.parameters[0] + calculator.mortgage_parameters[view.parameters[0]][3], labelpad=8)
+            ax.set_ylabel(view.parameters[1] + calculator.mortgage_parameters[view.parameters[1]][3], labelpad=8)
+        image = view.artists[plottable]
+        image.set_data(z)
+        if np.any(valid):
+            image.set_clim(np.nanmin(z), np.nanmax(z))
+        view.figure.canvas.draw_idle()
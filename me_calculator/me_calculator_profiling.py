@@ -0,0 +1,67 @@
+import json
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+# Active profiler, None when profiling is off: instrumented code only checks this attribute,
+# so disabled instrumentation costs one module attribute lookup per hook.
+profiler = None
+
+
+class MeCalculatorProfiler:
+    # Collects, while active:
+    #   timings:       seconds and calls per section ("validation", "evaluation", "rendering", "intermediate")
+    #   plottables:    points evaluated and points out of domain (NaN) per plottable
+    #   intermediates: how many times each scenario intermediate was computed
+    # callback, if given, is called as callback(section, name, seconds) after every timed section.
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.seconds = defaultdict(float)
+        self.calls = Counter()
+        self.evaluations = Counter()
+        self.rejections = Counter()
+        self.intermediates = Counter()
+
+    def record_time(self, section, name, seconds):
+        self.seconds[section] += seconds
+        self.calls[section] += 1
+        if section == "intermediate":
+            self.intermediates[name] += 1
+        if self.callback is not None:
+            self.callback(section, name, seconds)
+
+    def record_evaluation(self, plottable, points, rejections):
+        self.evaluations[plottable] += int(points)
+        self.rejections[plottable] += int(rejections)
+
+    @contextmanager
+    def section(self, section, name=None):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(section, name, perf_counter() - start)
+
+    def summary(self):
+        return {"timings": {section: {"seconds": self.seconds[section], "calls": self.calls[section]} for section in sorted(self.seconds)},
+                "plottables": {plottable: {"evaluations": self.evaluations[plottable], "rejections": self.rejections[plottable]} for plottable in sorted(self.evaluations)},
+                "intermediates": dict(sorted(self.intermediates.items()))}
+
+    def to_json(self, path=None):
+        summary = json.dumps(self.summary(), indent=2)
+        if path is not None:
+            with open(path, "w") as output_file:
+                output_file.write(summary)
+        return summary
+
+
+@contextmanager
+def profiling(callback=None):
+    # with profiling() as profile: ... ; profile.summary()
+    global profiler
+    previous = profiler
+    profiler = MeCalculatorProfiler(callback)
+    try:
+        yield profiler
+    finally:
+        profiler = previous
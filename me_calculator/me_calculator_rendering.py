@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+import copy
+import io
+import os
+
+from matplotlib import cm
+from matplotlib.figure import Figure
+import numpy as np
+
+from me_calculator import me_calculator_profiling
+from me_calculator.me_calculator_errors import UnknownParameter
+from me_calculator.me_calculator_parallel import create_executor, ordered_map
+
+# Off-screen rendering: figures are built on matplotlib.figure.Figure directly (no pyplot, no GUI backend, no global
+# figure list) and saved as PNG (Agg) or SVG, to a file or to bytes. The same builders serve the interactive plots of
+# me_calculator_plotting.
+
+kinds = ("heatmap", "contour", "surface")
+# Grid resolution per kind when none is given; a surface is one polygon per cell, so it is also capped
+# (level of detail) at max_surface_resolution per axis whatever the requested resolution
+default_resolutions = {"heatmap": 500, "contour": 200, "surface": 100}
+max_surface_resolution = 100
+
+
+def build_1d(figure, calculator, x_parameter, y_plottables, x, ys, valids):
+    ax = figure.add_subplot()
+    for i, y_plottable in enumerate(y_plottables):
+        y, valid = ys[i], valids[i]
+        ax.plot(x[valid], y[valid], lw=1.5, color=calculator.plot_colors[i % len(calculator.plot_colors)],
+                label=y_plottable + calculator.mortgage_plottables[y_plottable][0])
+    ax.set_xlabel(x_parameter + calculator.mortgage_parameters[x_parameter][3], labelpad=8)
+    ax.tick_params(labelsize=8)
+    ax.grid()
+    ax.legend()
+    return figure
+
+
+def build_2d(figure, calculator, x_parameter, y_parameter, z_plottable, x_axis, y_axis, z, valid, kind="surface"):
+    # z on the "xy" grid of x_axis and y_axis (as data_2d). Points out of domain stay NaN, so they are left out of
+    # the surface, the image or the contours and of the color limits.
+    if kind not in kinds:
+        raise ValueError("kind must be one of " + ", ".join(kinds))
+    z = np.where(valid, z, np.nan)
+    label = z_plottable + calculator.mortgage_plottables[z_plottable][0]
+    limits = (np.nanmin(z), np.nanmax(z)) if np.any(valid) else (None, None)
+    if kind == "surface":
+        ax = figure.add_subplot(projection="3d")
+        x, y = np.meshgrid(x_axis, y_axis)
+        artist = ax.plot_surface(x, y, z, rcount=z.shape[0], ccount=z.shape[1], linewidth=0, cmap=cm.coolwarm, antialiased=False)
+        if limits[0] is not None:
+            ax.set_zlim(limits[0] - 1, limits[1] + 1)
+        figure.colorbar(artist, ax=ax, shrink=0.5, aspect=5)
+    elif kind == "heatmap":
+        ax = figure.add_subplot()
+        artist = ax.imshow(z, origin="lower", aspect="auto", cmap=cm.coolwarm, extent=extent(x_axis) + extent(y_axis),
+                           vmin=limits[0], vmax=limits[1], interpolation="nearest")
+        figure.colorbar(artist, ax=ax, label=label)
+    else:
+        ax = figure.add_subplot()
+        artist = ax.contourf(x_axis, y_axis, z, levels=16, cmap=cm.coolwarm) if limits[0] is not None and limits[0] < limits[1] else None
+        if artist is not None:
+            ax.contour(x_axis, y_axis, z, levels=artist.levels, colors="black", linewidths=0.3)
+            figure.colorbar(artist, ax=ax, label=label)
+    ax.set_xlabel(x_parameter + calculator.mortgage_parameters[x_parameter][3], labelpad=8)
+    ax.set_ylabel(y_parameter + calculator.mortgage_parameters[y_parameter][3], labelpad=8)
+    ax.tick_params(labelsize=7)
+    return figure
+
+
+def extent(axis):
+    # Axes sample [min, max) with endpoint=False: the last cell ends one step after the last point
+    step = axis[1] - axis[0] if len(axis) > 1 else 1.
+    return (axis[0], axis[-1] + step)
+
+
+def surface_resolution(resolution):
+    # Level of detail of surfaces: at most max_surface_resolution points per axis
+    if isinstance(resolution, (list, tuple)):
+        return tuple(min(value, max_surface_resolution) for value in resolution)
+    return min(resolution, max_surface_resolution)
+
+
+def render_1d(calculator, x_parameter, y_plottables, path=None, format=None, resolution=1000, size=(6.4, 4.8), dpi=100):
+    x, ys, valids = calculator.data_1d_plottables(x_parameter, y_plottables, resolution=resolution)
+    figure = Figure(figsize=size, dpi=dpi)
+    with rendering("render_1d"):
+        build_1d(figure, calculator, x_parameter, y_plottables, x, ys, valids)
+        return save(figure, path, format)
+
+
+def render_2d(calculator, x_parameter, y_parameter, z_plottable, kind="heatmap", path=None, format=None, resolution=None, size=(6.4, 4.8), dpi=100):
+    if kind not in kinds:
+        raise ValueError("kind must be one of " + ", ".join(kinds))
+    resolution = resolution if resolution is not None else default_resolutions[kind]
+    if kind == "surface":
+        resolution = surface_resolution(resolution)
+    x, y, z, valid = calculator.data_2d(x_parameter, y_parameter, z_plottable, resolution=resolution)
+    figure = Figure(figsize=size, dpi=dpi)
+    with rendering("render_2d"):
+        build_2d(figure, calculator, x_parameter, y_parameter, z_plottable, x[0], y[:, 0], z, valid, kind)
+        return save(figure, path, format)
+
+
+def save(figure, path=None, format=None):
+    # Writes the figure to path and returns it or, without a path, returns the file content as bytes. The format
+    # ("png", "svg", ...) defaults to the extension of path, else png.
+    if format is None:
+        format = os.path.splitext(path)[1][1:].lower() if path is not None and os.path.splitext(path)[1] else "png"
+    if path is not None:
+        figure.savefig(path, format=format)
+        return path
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=format)
+    return buffer.getvalue()
+
+
+def render_batch(calculator, jobs, directory, format="png", workers=None, executor="process"):
+    # Renders many figures, in parallel processes by default (each worker gets its own copy of the calculator).
+    # A job is a dict of render_1d (x_parameter, y_plottables, ...) or render_2d (x_parameter, y_parameter,
+    # z_plottable, kind, ...) arguments, plus optionally "name" (file name without extension, by default the job
+    # number and plottables) and "scenario" ({parameter: value} set in mortgage_parameters for this figure only).
+    # Returns the paths of the files written to directory, in the order of jobs.
+    os.makedirs(directory, exist_ok=True)
+    arguments = []
+    for i, job in enumerate(jobs):
+        job = dict(job)
+        name = job.pop("name", None) or "-".join([str(i)] + list(job.get("y_plottables") or [job.get("z_plottable")]))
+        arguments.append((calculator, job, os.path.join(directory, name + "." + job.pop("format", format))))
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(arguments) < 2:
+        return [render_job(*argument) for argument in arguments]
+    pool = create_executor(executor, workers)
+    try:
+        return list(ordered_map(pool, render_job, arguments, 2 * workers))
+    finally:
+        if pool is not executor:
+            pool.shutdown()
+
+
+def render_job(calculator, job, path):
+    job = dict(job)
+    scenario = job.pop("scenario", None)
+    if scenario:
+        calculator = copy.deepcopy(calculator)
+        for parameter, value in scenario.items():
+            if parameter not in calculator.mortgage_parameters:
+                raise UnknownParameter(parameter)
+            calculator.mortgage_parameters[parameter][0] = value
+    if "z_plottable" in job:
+        return calculator.render_2d(path=path, **job)
+    return calculator.render_1d(path=path, **job)
+
+
+@contextmanager
+def rendering(name):
+    profiler = me_calculator_profiling.profiler
+    if profiler is None:
+        yield
+    else:
+        with profiler.section("rendering", name):
+            yield
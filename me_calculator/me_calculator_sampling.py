@@ -0,0 +1,99 @@
+import numpy as np
+
+
+def adaptive_1d(function, lower, upper, tolerance=1e-3, max_evaluations=1000, initial_points=17, boundary_tolerance=None):
+    # Samples a vectorized function (NaN out of domain) on [lower, upper], refining only where needed:
+    # where the curve departs from linear interpolation by more than tolerance (relative to its range),
+    # and around domain boundaries until they are bracketed within boundary_tolerance.
+    # Returns the sorted x, y and validity mask; at most max_evaluations function evaluations are made.
+    boundary_tolerance = boundary_tolerance if boundary_tolerance is not None else 1e-6 * (upper - lower)
+    x = np.linspace(lower, upper, min(initial_points, max_evaluations))
+    y = _evaluate(function, x)
+    evaluations = len(x)
+    while evaluations < max_evaluations:
+        priority = _interval_priority(x, y, tolerance, boundary_tolerance)
+        refine = np.flatnonzero(priority > 0.)
+        if not len(refine):
+            break
+        refine = refine[np.argsort(-priority[refine], kind="stable")][:max_evaluations - evaluations]
+        new_x = 0.5 * (x[refine] + x[refine + 1])
+        x, y = _merge(x, y, new_x, _evaluate(function, new_x))
+        evaluations += len(new_x)
+    return x, y, np.isfinite(y)
+
+
+def adaptive_2d(function, x_lower, x_upper, y_lower, y_upper, tolerance=1e-3, max_evaluations=100000, initial_points=17, boundary_tolerance=None):
+    # Tensor-product version of adaptive_1d for a vectorized function(x, y): x and y nodes are refined
+    # independently, each where some row (column) of the surface needs it. Only new rows and columns are evaluated.
+    # Returns the 1d x and y nodes and the values and validity mask on their grid (shape len(y) x len(x)).
+    x_boundary_tolerance = boundary_tolerance if boundary_tolerance is not None else 1e-6 * (x_upper - x_lower)
+    y_boundary_tolerance = boundary_tolerance if boundary_tolerance is not None else 1e-6 * (y_upper - y_lower)
+    # The initial grid fits in the budget too
+    initial_points = max(1, min(initial_points, int(np.sqrt(max_evaluations))))
+    x = np.linspace(x_lower, x_upper, initial_points)
+    y = np.linspace(y_lower, y_upper, initial_points)
+    z = _evaluate(function, x[None, :], y[:, None])
+    evaluations = z.size
+    while evaluations < max_evaluations:
+        x_priority = _interval_priority(x, z, tolerance, x_boundary_tolerance)
+        y_priority = _interval_priority(y, z.T, tolerance, y_boundary_tolerance)
+        x_refine = np.flatnonzero(x_priority > 0.)
+        y_refine = np.flatnonzero(y_priority > 0.)
+        if not len(x_refine) and not len(y_refine):
+            break
+        budget = max_evaluations - evaluations
+        x_refine = x_refine[np.argsort(-x_priority[x_refine], kind="stable")][:max(budget // len(y), 0)]
+        if len(x_refine):
+            new_x = 0.5 * (x[x_refine] + x[x_refine + 1])
+            new_z = _evaluate(function, new_x[None, :], y[:, None])
+            evaluations += new_z.size
+            x, z = _merge(x, z.T, new_x, new_z.T)
+            z = z.T
+        budget = max_evaluations - evaluations
+        y_refine = y_refine[np.argsort(-y_priority[y_refine], kind="stable")][:max(budget // len(x), 0)]
+        if len(y_refine):
+            new_y = 0.5 * (y[y_refine] + y[y_refine + 1])
+            new_z = _evaluate(function, x[None, :], new_y[:, None])
+            evaluations += new_z.size
+            y, z = _merge(y, z, new_y, new_z)
+        if not len(x_refine) and not len(y_refine):
+            break
+    return x, y, z, np.isfinite(z)
+
+
+def _evaluate(function, *arguments):
+    with np.errstate(all="ignore"):
+        return np.array(np.broadcast_to(function(*arguments), np.broadcast_shapes(*[np.shape(argument) for argument in arguments])), dtype=float)
+
+
+def _interval_priority(x, y, tolerance, boundary_tolerance):
+    # Refinement priority of each interval [x[i], x[i+1]] (0 when it is accurate enough) for one curve y,
+    # or the highest over several curves stacked along the first axis of y:
+    # domain boundaries come first, then the interpolation error of the nodes at either end
+    y = np.atleast_2d(y)
+    valid = np.isfinite(y)
+    width = np.diff(x)
+    priority = np.zeros(y.shape[:1] + width.shape)
+    with np.errstate(all="ignore"):
+        scale = tolerance * (np.max(y, axis=1, initial=-np.inf, where=valid) - np.min(y, axis=1, initial=np.inf, where=valid))
+    scale = np.where(np.isfinite(scale), scale, 0.)[:, None]
+    if len(x) > 2:
+        left, right = width[:-1], width[1:]
+        interpolated = (y[:, :-2] * right + y[:, 2:] * left) / (left + right)
+        error = np.abs(y[:, 1:-1] - interpolated)
+        error = np.where(valid[:, :-2] & valid[:, 1:-1] & valid[:, 2:] & (error > np.maximum(scale, np.finfo(float).tiny)), error, 0.)
+        priority[:, :-1] = np.maximum(priority[:, :-1], error)
+        priority[:, 1:] = np.maximum(priority[:, 1:], error)
+    boundary = (valid[:, :-1] != valid[:, 1:]) & (width > boundary_tolerance)
+    priority[boundary] = np.inf
+    priority = priority.max(axis=0)
+    # Intervals too narrow to split meaningfully are left alone
+    priority[width <= 1e-12 * (x[-1] - x[0])] = 0.
+    return priority
+
+
+def _merge(x, y, new_x, new_y):
+    # Inserts new nodes (and their values along the first axis of y) keeping x sorted
+    x = np.concatenate([x, new_x])
+    order = np.argsort(x, kind="stable")
+    return x[order], np.concatenate([y, new_y])[order]
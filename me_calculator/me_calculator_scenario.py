@@ -0,0 +1,244 @@
+from math import log
+
+import numpy as np
+
+from me_calculator.me_calculator_decorators import cached_intermediate
+from me_calculator.me_calculator_derivatives import Dual, solve_interest_rate_dual
+from me_calculator.me_calculator_solvers import solve_interest_rate
+
+
+# Domain constraints of the intermediates that are not plottables (plottables declare theirs in the registry)
+intermediate_domains = {"mortgage_no_closing": ("amortizing",),
+                        "mortgage_with_closing": ("amortizing",)}
+
+
+def _log(value):
+    # NaN out of domain, for scalars and arrays alike
+    if isinstance(value, float):
+        return np.float64(log(value)) if value > 0. else np.float64(np.nan)
+    return np.log(np.where(value > 0., value, np.nan))
+
+
+def _as_float(value):
+    # np.float64 scalars divide by zero into inf/NaN where Python floats would raise ZeroDivisionError
+    return np.float64(value) if isinstance(value, (int, float)) else value
+
+
+def _masked(value, valid):
+    if isinstance(value, float) and not isinstance(valid, np.ndarray):
+        return float(value) if valid else np.nan
+    return np.where(valid, value, np.nan)
+
+
+class MeCalculatorScenario:
+    # One set of inputs (floats or broadcastable arrays) evaluated against a MeCalculatorFunctions configuration.
+    # Every intermediate (home price, escrow, duration, ...) and every plottable is a property computed at most once,
+    # so several plottables of the same scenario share all the work they have in common.
+    # Inputs are the plottable arguments: downpayment, mortgage_payment, mortgage_duration, mortgage_principal,
+    # mortgage_interest_rate, property_value_growth_rate and time; only those needed by the requested plottables are required.
+    # The properties are the bare formulas; value() and evaluate() also set to NaN the points outside the domain the
+    # plottable declares (the "amortizing", "within_duration" and "solvable_rate" constraints below). Nothing raises
+    # out of domain, scalars included.
+    def __init__(self, functions, **inputs):
+        self.functions = functions
+        self.inputs = {name: _as_float(value) for name, value in inputs.items()}
+        self.intermediates = {}
+
+    def evaluate(self, plottables):
+        return [self.value(plottable) for plottable in plottables]
+
+    def value(self, name):
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            return _masked(getattr(self, name), self._valid(name))
+
+    def valid(self, name):
+        # True (a boolean array for array inputs) where the inputs satisfy every domain constraint of the plottable;
+        # only the constraints are computed, not the plottable itself
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            return self._valid(name)
+
+    def _valid(self, name):
+        registered = self.functions.plottables.get(name)
+        valid = True
+        for constraint in registered.domain if registered is not None else intermediate_domains.get(name, ()):
+            valid = valid & getattr(self, constraint)
+        return valid
+
+    def _input(self, name):
+        if name not in self.inputs:
+            raise TypeError("MeCalculatorScenario needs the input '" + name + "'")
+        return self.inputs[name]
+
+    # Intermediates
+
+    @cached_intermediate
+    def home_price(self):
+        return self._input("mortgage_principal") / (1. - self._input("downpayment"))
+
+    @cached_intermediate
+    def escrow_expenses(self):
+        return self.functions.escrow_rate * self.home_price if self.functions.include_escrow_expenses else 0.
+
+    @cached_intermediate
+    def corrected_payment(self):
+        return self._input("mortgage_payment") - self.escrow_expenses
+
+    @cached_intermediate
+    def duration(self):
+        interest_rate = self._input("mortgage_interest_rate")
+        corrected_payment = self.corrected_payment
+        return _log(corrected_payment / (corrected_payment - interest_rate * self._input("mortgage_principal"))) / _log(1. + interest_rate)
+
+    @cached_intermediate
+    def interest_growth(self):
+        return np.power(1. + self._input("mortgage_interest_rate"), self._input("time"))
+
+    @cached_intermediate
+    def property_growth(self):
+        return np.power(1. + self.functions.property_value_growth_rate, self._input("time"))
+
+    @cached_intermediate
+    def downpayment_amount(self):
+        return self._input("downpayment") * self.home_price
+
+    # Domain constraints
+
+    @cached_intermediate
+    def amortizing(self):
+        # The payment net of escrow is positive and exceeds the interest of the first year, so the mortgage is repaid
+        interest_rate = self._input("mortgage_interest_rate")
+        corrected_payment = self.corrected_payment
+        return (corrected_payment > 0.) & (corrected_payment > interest_rate * self._input("mortgage_principal")) & \
+               (interest_rate > -1.) & (interest_rate != 0.)
+
+    @cached_intermediate
+    def within_duration(self):
+        return self._input("time") <= self.duration
+
+    @cached_intermediate
+    def solvable_rate(self):
+        return np.isfinite(self.mortgage_interest_rate)
+
+    # Plottables (same formulas as the MeCalculatorFunctions methods of the same name)
+
+    @cached_intermediate
+    def mortgage_payment(self):
+        interest_rate = self._input("mortgage_interest_rate")
+        base_n = np.power(1. + interest_rate, self._input("mortgage_duration"))
+        return interest_rate * self._input("mortgage_principal") * base_n / (base_n - 1.) + self.escrow_expenses
+
+    @cached_intermediate
+    def mortgage_principal(self):
+        interest_rate = self._input("mortgage_interest_rate")
+        escrow_rate = self.functions.escrow_rate if self.functions.include_escrow_expenses else 0.
+        base_n = np.power(1. + interest_rate, self._input("mortgage_duration"))
+        a = (base_n - 1.) / interest_rate
+        b = 1. / (1. - self._input("downpayment"))
+        return self._input("mortgage_payment") * a / (base_n + b * a * escrow_rate)
+
+    @cached_intermediate
+    def mortgage_interest_rate(self):
+        payment, principal, duration = self.corrected_payment, self._input("mortgage_principal"), self._input("mortgage_duration")
+        if isinstance(payment, Dual) or isinstance(principal, Dual) or isinstance(duration, Dual):
+            return solve_interest_rate_dual(payment, principal, duration, tolerance=self.functions.interest_rate_tolerance)
+        interest_rate = solve_interest_rate(payment, principal, duration, tolerance=self.functions.interest_rate_tolerance)
+        return float(interest_rate) if np.ndim(interest_rate) == 0 else interest_rate
+
+    @cached_intermediate
+    def mortgage_duration(self):
+        return self.duration
+
+    @cached_intermediate
+    def mortgage_interest(self):
+        return self.corrected_payment * self.duration - self._input("mortgage_principal")
+
+    @cached_intermediate
+    def mortgage_escrow(self):
+        return self.duration * self.escrow_expenses
+
+    @cached_intermediate
+    def mortgage_no_closing(self):
+        return self.duration * self._input("mortgage_payment")
+
+    @cached_intermediate
+    def mortgage_with_closing(self):
+        return self.functions.closing_costs * self._input("mortgage_principal") + self.mortgage_no_closing
+
+    @cached_intermediate
+    def total_cost(self):
+        return self.downpayment_amount + self.mortgage_with_closing
+
+    @cached_intermediate
+    def property_value(self):
+        if "property_value_growth_rate" in self.inputs:
+            growth = np.power(1. + self.inputs["property_value_growth_rate"], self._input("time"))
+        else:
+            growth = self.property_growth
+        return (self.downpayment_amount + self._input("mortgage_principal")) * growth
+
+    @cached_intermediate
+    def mortgage_principal_residual(self):
+        interest_growth = self.interest_growth
+        return self._input("mortgage_principal") * interest_growth - self.corrected_payment * (interest_growth - 1.) / self._input("mortgage_interest_rate")
+
+    @cached_intermediate
+    def mortgage_principal_paid(self):
+        return self._input("mortgage_principal") - self.mortgage_principal_residual
+
+    @cached_intermediate
+    def mortgage_interest_residual(self):
+        mortgage_total = self.duration * self.corrected_payment
+        amount_paid_to_date = self._input("time") * self.corrected_payment
+        return mortgage_total - amount_paid_to_date - self.mortgage_principal_residual
+
+    @cached_intermediate
+    def mortgage_interest_paid(self):
+        return self.mortgage_interest - self.mortgage_interest_residual
+
+    @cached_intermediate
+    def mortgage_escrow_residual(self):
+        return (self.duration - self._input("time")) * self.escrow_expenses
+
+    @cached_intermediate
+    def mortgage_escrow_paid(self):
+        return self._input("time") * self.escrow_expenses
+
+    @cached_intermediate
+    def mortgage_residual(self):
+        return (self.duration - self._input("time")) * self._input("mortgage_payment")
+
+    @cached_intermediate
+    def mortgage_paid(self):
+        return self._input("time") * self._input("mortgage_payment")
+
+    @cached_intermediate
+    def total_cost_residual(self):
+        return self.total_cost - self.total_cost_paid
+
+    @cached_intermediate
+    def total_cost_paid(self):
+        return self.total_cost
+
+    @cached_intermediate
+    def accrued_costs(self):
+        return self.downpayment_amount + self.functions.closing_costs * self.home_price + self._input("time") * self._input("mortgage_payment")
+
+    @cached_intermediate
+    def home_purchase_total_return(self):
+        return (self.downpayment_amount + self._input("mortgage_principal")) * self.property_growth * (1. - self.functions.closing_costs)
+
+    @cached_intermediate
+    def home_purchase_net_return(self):
+        return self.home_purchase_total_return - self.mortgage_principal_residual
+
+    @cached_intermediate
+    def no_home_purchase_total_return(self):
+        functions = self.functions
+        rent = self.home_price / functions.price_to_rent_ratio * self.property_growth
+        initial_capital = self.downpayment_amount + functions.closing_costs * self.home_price  # Downpayment + closing cost
+        yearly_capital_to_invest = self._input("mortgage_payment") - rent  # Cash available for investment after rent is paid
+        base = 1. + functions.market_rate_of_return
+        base_n = np.power(base, self._input("time"))
+        return_from_initial_capital = initial_capital * base_n
+        return_from_yearly_investment = yearly_capital_to_invest * (base / functions.market_rate_of_return) * (base_n - 1.)
+        return return_from_initial_capital + return_from_yearly_investment
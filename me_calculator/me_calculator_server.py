@@ -0,0 +1,230 @@
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_batch import MeCalculatorBatch, MeCalculatorFunctionsCache, constructor_columns
+
+# JSON over HTTP/1.1 (keep-alive), standard library only:
+#   POST /evaluate  {"plottables": [...], "inputs": {argument: float}, "config": {constructor argument: value}}
+#                   (distinct plottables; inputs other than their arguments are ignored)
+#                   -> {"values": {plottable: float or null (out of domain)}}
+#   POST /sweep     {"plottable": ..., "parameters": [...], "ranges": [[min, max], ...], "resolution": int or [...],
+#                    "inputs": {other argument: float}, "config": {...}}
+#                   -> {"axes": [[...], ...], "values": nested lists ("ij" indexing, as MeCalculator.data_nd)}
+#   GET  /stats     -> requests, batches and latency percentiles (milliseconds) per endpoint
+# Concurrent /evaluate requests are coalesced: they wait up to window seconds (or until max_batch are pending) and are
+# then evaluated together, as the rows of one MeCalculatorBatch per set of plottables, whatever their configurations.
+# MeCalculatorFunctions instances are cached per configuration (max_configurations at most) and shared by all requests.
+
+reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    pass
+
+
+class MeCalculatorServer:
+    def __init__(self, host="127.0.0.1", port=8080, window=0.002, max_batch=10000, latency_samples=10000, max_configurations=256):
+        self.host = host
+        self.port = port
+        self.window = window
+        self.max_batch = max_batch
+        # Configuration -> MeCalculatorFunctions (same defaults as batch CSVs), the most recently used ones only
+        self.functions = MeCalculatorFunctionsCache(max_size=max_configurations)
+        self.pending = []
+        self.flush_handle = None
+        self.server = None
+        self.latencies = defaultdict(lambda: deque(maxlen=latency_samples))
+        self.counts = defaultdict(int)
+        self.batch_count = 0
+        self.batched_rows = 0
+
+    async def start(self):
+        # Port 0 picks a free port, available as self.port once started
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def stats(self):
+        endpoints = {}
+        for endpoint, latencies in self.latencies.items():
+            milliseconds = np.array(latencies) * 1000.
+            p50, p90, p99 = np.percentile(milliseconds, [50., 90., 99.]).tolist()
+            endpoints[endpoint] = {"requests": self.counts[endpoint], "p50": p50, "p90": p90, "p99": p99, "max": float(milliseconds.max())}
+        return {"endpoints": endpoints, "batches": self.batch_count,
+                "rows_per_batch": self.batched_rows / self.batch_count if self.batch_count else 0.}
+
+    # HTTP
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                start = time.perf_counter()
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, response = await self._route(method, path, body)
+                payload = json.dumps(response).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n"
+                             .format(status, reasons[status], len(payload), "keep-alive" if keep_alive else "close").encode("latin-1") + payload)
+                await writer.drain()
+                if status != 404:
+                    self.latencies[path].append(time.perf_counter() - start)
+                    self.counts[path] += 1
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        routes = {"/evaluate": ("POST", self._evaluate), "/sweep": ("POST", self._sweep), "/stats": ("GET", None)}
+        if path not in routes:
+            return 404, {"error": "unknown endpoint " + path}
+        if method != routes[path][0]:
+            return 405, {"error": path + " expects " + routes[path][0]}
+        if path == "/stats":
+            return 200, self.stats()
+        try:
+            return 200, await routes[path][1](json.loads(body or b"{}"))
+        except (RequestError, AttributeError, KeyError, TypeError, ValueError) as error:
+            return 400, {"error": "{}: {}".format(type(error).__name__, error)}
+        except Exception as error:
+            return 500, {"error": "{}: {}".format(type(error).__name__, error)}
+
+    # Endpoints
+
+    async def _evaluate(self, request):
+        plottables = tuple(request["plottables"])
+        if len(set(plottables)) != len(plottables):
+            raise RequestError("plottables must not repeat")
+        config = _config(request.get("config", {}))
+        arguments = set()
+        for plottable in plottables:
+            if plottable not in MeCalculatorFunctions.plottables:
+                raise RequestError("unknown plottable " + plottable)
+            arguments.update(MeCalculatorFunctions.plottables[plottable].arguments)
+        # Only the arguments of the plottables: other inputs must not reach the configuration
+        inputs = {name: float(value) for name, value in request.get("inputs", {}).items() if name in arguments}
+        for plottable in plottables:
+            missing = [argument for argument in MeCalculatorFunctions.plottables[plottable].arguments if argument not in inputs]
+            if missing:
+                raise RequestError(plottable + " needs " + ", ".join(missing))
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((plottables, inputs, config, future))
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        values = await future
+        return {"values": dict(zip(plottables, _to_json(np.array(values))))}
+
+    async def _sweep(self, request):
+        # Grids can be large: evaluated off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self._evaluate_sweep, request)
+
+    def _evaluate_sweep(self, request):
+        plottable, parameters = request["plottable"], list(request["parameters"])
+        if plottable not in MeCalculatorFunctions.plottables:
+            raise RequestError("unknown plottable " + plottable)
+        arguments = MeCalculatorFunctions.plottables[plottable].arguments
+        resolution = request.get("resolution", 100)
+        resolutions = resolution if isinstance(resolution, list) else [resolution] * len(parameters)
+        axes = [np.linspace(float(lower), float(upper), int(resolutions[i]), endpoint=False) for i, (lower, upper) in enumerate(request["ranges"])]
+        if len(axes) != len(parameters) or any(parameter not in arguments for parameter in parameters):
+            raise RequestError("parameters must be arguments of " + plottable + ", with one range each")
+        inputs = {name: float(value) for name, value in request.get("inputs", {}).items() if name in arguments}
+        inputs.update(zip(parameters, np.meshgrid(*axes, indexing="ij", sparse=True)))
+        missing = [argument for argument in arguments if argument not in inputs]
+        if missing:
+            raise RequestError(plottable + " needs " + ", ".join(missing))
+        functions = self._functions(_config(request.get("config", {})))
+        values = functions.scenario(**inputs).evaluate([plottable])[0]
+        values = np.broadcast_to(values, tuple(len(axis) for axis in axes))
+        return {"axes": [axis.tolist() for axis in axes], "values": _to_json(values)}
+
+    # Coalescing
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        pending, self.pending = self.pending, []
+        # Requests for the same plottables, in any order, are evaluated together
+        groups = defaultdict(list)
+        for entry in pending:
+            groups[tuple(sorted(entry[0]))].append(entry)
+        for plottables, entries in groups.items():
+            try:
+                results = dict(zip(plottables, self._batch(plottables).evaluate_columns(*_columns(entries))))
+            except Exception as error:
+                for entry in entries:
+                    if not entry[3].done():
+                        entry[3].set_exception(error)
+                continue
+            self.batch_count += 1
+            self.batched_rows += len(entries)
+            for row, entry in enumerate(entries):
+                if not entry[3].done():
+                    entry[3].set_result([results[plottable][row] for plottable in entry[0]])
+
+    def _batch(self, plottables):
+        # Built per batch (cheap) rather than kept per set of plottables, which clients choose; all share the
+        # MeCalculatorFunctions cache of the server
+        batch = MeCalculatorBatch(plottables, chunk_size=self.max_batch)
+        batch.functions = self.functions
+        return batch
+
+    def _functions(self, config):
+        return self.functions.get({name: np.nan if value is None else value for name, value in config.items()})
+
+
+def _config(config):
+    unknown = [name for name in config if name not in constructor_columns]
+    if unknown:
+        raise RequestError("unknown configuration " + ", ".join(unknown))
+    return {name: None if value is None else float(value) for name, value in config.items()}
+
+
+def _columns(entries):
+    # One row per request: the input columns and, separately, the configuration columns (property_value_growth_rate
+    # can be both, with different values), NaN where a request does not set them
+    # (NaN configuration values take the MeCalculatorFunctions defaults, except escrow_rate: no escrow)
+    return _stack([inputs for _, inputs, _, _ in entries]), _stack([config for _, _, config, _ in entries])
+
+
+def _stack(rows):
+    names = set()
+    for row in rows:
+        names.update(row)
+    return {name: np.array([np.nan if row.get(name) is None else row[name] for row in rows], dtype=float) for name in names}
+
+
+def _to_json(values):
+    # Out of domain (NaN) values become null
+    return np.where(np.isfinite(values), values, None).tolist()
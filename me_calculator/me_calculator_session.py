@@ -0,0 +1,102 @@
+import inspect
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_errors import UnknownParameter
+
+# MeCalculatorFunctions constructor arguments, the knobs a session can change
+knob_names = tuple(inspect.getfullargspec(MeCalculatorFunctions.__init__).args[1:])
+
+
+class MeCalculatorSessionView:
+    # One plot of a session: the plottables over one (1d) or two (2d) parameter axes, their last computed data and,
+    # once drawn, the figure and the artists showing them
+    def __init__(self, parameters, plottables, resolution, ranges):
+        self.parameters = parameters
+        self.plottables = plottables
+        self.resolution = resolution
+        self.ranges = ranges
+        self.axes = None
+        self.values = {}
+        self.valids = {}
+        self.figure = None
+        self.artists = None
+
+    def depends_on(self, plottable, changes):
+        # Whether a change of these parameters or knobs invalidates the plottable in this view: the parameters on the
+        # axes of the view do not, they are swept
+        registered = MeCalculatorFunctions.plottables[plottable]
+        return any((name in registered.arguments and name not in self.parameters) or name in registered.knobs for name in changes)
+
+
+class MeCalculatorSession:
+    # Stateful session over a MeCalculator for interactive exploration: views (1d curves, 2d heatmaps) are added once,
+    # then update() changes parameters (mortgage_parameters values) or knobs (MeCalculatorFunctions constructor
+    # arguments) and recomputes, and redraws, only the plottables of the views whose arguments or knobs changed
+    # (see the knobs of the plottable registry). Drawn views keep their figure and artists, whose data is replaced.
+    def __init__(self, calculator):
+        self.calculator = calculator
+        self.views = []
+
+    def add_view_1d(self, x_parameter, y_plottables, resolution=1000, x_range=None):
+        view = MeCalculatorSessionView([x_parameter], list(y_plottables), resolution, [x_range])
+        self._compute(view, view.plottables)
+        self.views.append(view)
+        return view
+
+    def add_view_2d(self, x_parameter, y_parameter, z_plottable, resolution=200, x_range=None, y_range=None):
+        view = MeCalculatorSessionView([x_parameter, y_parameter], [z_plottable], resolution, [x_range, y_range])
+        self._compute(view, view.plottables)
+        self.views.append(view)
+        return view
+
+    def update(self, **changes):
+        # Returns the plottables recomputed, as a list of (view, plottables)
+        knobs = {name: value for name, value in changes.items() if name in knob_names}
+        for name, value in changes.items():
+            if name in self.calculator.mortgage_parameters:
+                self.calculator.mortgage_parameters[name][0] = value
+            elif name not in knobs:
+                raise UnknownParameter(name)
+        if knobs:
+            # A new instance rather than updated attributes, so that derived ones (include_escrow_expenses) follow
+            functions = self.calculator.functions
+            arguments = {name: getattr(functions, name) for name in knob_names}
+            arguments.update(knobs)
+            self.calculator.functions = MeCalculatorFunctions(**arguments)
+        recomputed = []
+        for view in self.views:
+            plottables = [plottable for plottable in view.plottables if view.depends_on(plottable, changes)]
+            if plottables:
+                self._compute(view, plottables)
+                if view.figure is not None:
+                    self._draw(view)
+                recomputed.append((view, plottables))
+        return recomputed
+
+    def draw(self):
+        # Draws the views not drawn yet (later updates redraw them); returns the figures of all views
+        for view in self.views:
+            if view.figure is None:
+                self._draw(view)
+        return [view.figure for view in self.views]
+
+    def _compute(self, view, plottables):
+        calculator = self.calculator
+        if len(view.parameters) == 1:
+            x, ys, valids = calculator.data_1d_plottables(view.parameters[0], plottables, resolution=view.resolution, x_range=view.ranges[0])
+            view.axes = [x]
+            view.values.update(zip(plottables, ys))
+            view.valids.update(zip(plottables, valids))
+        else:
+            x, y, z, valid = calculator.data_2d(view.parameters[0], view.parameters[1], plottables[0], resolution=view.resolution,
+                                                x_range=view.ranges[0], y_range=view.ranges[1])
+            view.axes = [x[0], y[:, 0]]
+            view.values[plottables[0]] = z
+            view.valids[plottables[0]] = valid
+
+    def _draw(self, view):
+        from me_calculator import me_calculator_plotting
+        if len(view.parameters) == 1:
+            me_calculator_plotting.draw_view_1d(self.calculator, view)
+        else:
+            me_calculator_plotting.draw_view_2d(self.calculator, view)
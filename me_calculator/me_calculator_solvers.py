@@ -0,0 +1,81 @@
+import numpy as np
+
+
+def solve_interest_rate(mortgage_payment, mortgage_principal, mortgage_duration, tolerance=1e-10, max_rate=1., max_iterations=100):
+    # Yearly interest rate at which a payment (escrow excluded) repays the principal in the given duration.
+    # Newton iterations on the annuity formula, safeguarded by bisection inside (0, max_rate].
+    # All arguments broadcast against each other; unsolvable points (rate <= 0 or > max_rate) are NaN.
+    payment, principal, duration = np.broadcast_arrays(np.asarray(mortgage_payment, dtype=float),
+                                                       np.asarray(mortgage_principal, dtype=float),
+                                                       np.asarray(mortgage_duration, dtype=float))
+    with np.errstate(all='ignore'):
+        solvable = (principal > 0.) & (duration > 0.) & (payment > principal / duration)
+        solvable &= _annuity_payment(np.full(payment.shape, max_rate), principal, duration)[0] >= payment
+        low = np.zeros(payment.shape)
+        high = np.full(payment.shape, float(max_rate))
+        # First order expansion of the annuity payment around a zero rate
+        rate = 2. * (payment / principal - 1. / duration) * duration / (duration + 1.)
+        rate = np.where(solvable, np.clip(rate, tolerance, max_rate), np.nan)
+        pending = solvable.copy()
+        for _ in range(max_iterations):
+            if not pending.any():
+                break
+            value, derivative = _annuity_payment(rate, principal, duration)
+            value -= payment
+            high = np.where(pending & (value > 0.), rate, high)
+            low = np.where(pending & (value <= 0.), rate, low)
+            step = rate - value / derivative
+            outside = ~((step > low) & (step < high))
+            step = np.where(outside, 0.5 * (low + high), step)
+            converged = np.abs(step - rate) <= tolerance
+            rate = np.where(pending, step, rate)
+            pending &= ~converged
+    return rate
+
+
+def _annuity_payment(rate, principal, duration):
+    # Yearly payment and its derivative with respect to the rate
+    discount = -np.expm1(-duration * np.log1p(rate))
+    payment = principal * rate / discount
+    discount_derivative = duration * (1. - discount) / (1. + rate)
+    derivative = principal * (discount - rate * discount_derivative) / (discount * discount)
+    return payment, derivative
+
+
+def solve_crossing(function, lower, upper, shape=(), tolerance=1e-10, brackets=32, max_iterations=100):
+    # Smallest x in [lower, upper] at which function(x) crosses zero, for every point of a grid of the given shape.
+    # function takes x as a float or an array of that shape and returns the values broadcastable to it, NaN out of
+    # domain. The first sign change over brackets intervals is located (one evaluation of the grid per node, so memory
+    # stays that of the grid), then refined by Illinois (modified regula falsi) iterations down to tolerance, relative
+    # to the range. Points without a sign change, or with one across a domain boundary only, are NaN.
+    nodes = np.linspace(lower, upper, brackets + 1)
+    with np.errstate(all='ignore'):
+        value = np.broadcast_to(function(nodes[0]), shape)
+        found = value == 0.
+        root = np.where(found, nodes[0], np.nan)
+        a, b = np.full(shape, nodes[0]), np.full(shape, nodes[0])
+        fa, fb = np.zeros(shape), np.zeros(shape)
+        for left, right in zip(nodes[:-1], nodes[1:]):
+            if found.all():
+                break
+            previous, value = value, np.broadcast_to(function(right), shape)
+            crossing = ~found & np.isfinite(previous) & np.isfinite(value) & (np.sign(previous) != np.sign(value))
+            a, fa = np.where(crossing, left, a), np.where(crossing, previous, fa)
+            b, fb = np.where(crossing, right, b), np.where(crossing, value, fb)
+            root = np.where(crossing & (value == 0.), right, root)
+            found |= crossing
+        pending = found & np.isnan(root)
+        tolerance = tolerance * (upper - lower)
+        for _ in range(max_iterations):
+            if not pending.any():
+                break
+            c = np.where(pending, b - fb * (b - a) / (fb - fa), b)
+            fc = np.broadcast_to(function(c), shape)
+            # The end that stays put has its value halved, so that it is eventually replaced as well
+            flip = np.sign(fc) != np.sign(fb)
+            a, fa = np.where(flip, b, a), np.where(flip, fb, 0.5 * fa)
+            b, fb = c, fc
+            converged = (np.abs(b - a) <= tolerance) | (fc == 0.) | np.isnan(fc)
+            root = np.where(pending, c, root)
+            pending &= ~converged
+    return root
@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+import numpy as np
+
+# One block of an N-dimensional sweep: its position in the full grid (a tuple of slices), the part of each parameter
+# axis it covers and the values of the plottables on it (one array of the block shape per plottable)
+SweepTile = namedtuple("SweepTile", ["index", "axes", "values"])
+
+reductions = ("min", "max", "argmin", "argmax")
+
+
+def tile_shape(shape, max_points):
+    # Largest block of at most max_points points made of whole trailing axes, part of one axis and single
+    # indices of the leading ones, so that blocks taken in order are contiguous in the C order of the grid
+    tile = [1] * len(shape)
+    points = 1
+    for axis in reversed(range(len(shape))):
+        if points * shape[axis] > max_points:
+            tile[axis] = max(1, max_points // points)
+            break
+        tile[axis] = shape[axis]
+        points *= shape[axis]
+    return tuple(tile)
+
+
+def tile_indices(shape, tile):
+    # Slices of every block, in C order
+    starts = np.stack(np.meshgrid(*[np.arange(0, length, step) for length, step in zip(shape, tile)], indexing="ij"), axis=-1).reshape(-1, len(shape))
+    for start in starts.tolist():
+        yield tuple(slice(begin, min(begin + step, length)) for begin, step, length in zip(start, tile, shape))
+
+
+def sweep_tiles(evaluate, axes, max_points):
+    # Tiles of the grid of axes, evaluated one at a time by evaluate(grids) (sparse "ij" grids of the block, one per axis)
+    shape = tuple(len(axis) for axis in axes)
+    for index in tile_indices(shape, tile_shape(shape, max_points)):
+        tile_axes = [axis[part] for axis, part in zip(axes, index)]
+        yield SweepTile(index, tile_axes, evaluate(np.meshgrid(*tile_axes, indexing="ij", sparse=True)))
+
+
+def reduce_tiles(tiles, axes, axis, reduction):
+    # Streams tiles of one plottable into its min or max along axis (ignoring NaN), or the axis value at which it is
+    # reached for argmin and argmax; NaN where the plottable is NaN all along the axis. Only the result, the grid
+    # without axis, is kept in memory.
+    if reduction not in reductions:
+        raise ValueError("reduction must be one of " + ", ".join(reductions))
+    maximum = reduction.endswith("max")
+    fill = -np.inf if maximum else np.inf
+    shape = tuple(len(other) for i, other in enumerate(axes) if i != axis)
+    best = np.full(shape, fill)
+    location = np.full(shape, np.nan)
+    for tile in tiles:
+        values = np.where(np.isnan(tile.values[0]), fill, tile.values[0])
+        position = np.argmax(values, axis=axis) if maximum else np.argmin(values, axis=axis)
+        extremum = np.take_along_axis(values, np.expand_dims(position, axis), axis=axis).squeeze(axis)
+        index = tile.index[:axis] + tile.index[axis + 1:]
+        better = (extremum > best[index]) if maximum else (extremum < best[index])
+        best[index] = np.where(better, extremum, best[index])
+        location[index] = np.where(better, tile.axes[axis][position], location[index])
+    if reduction in ("min", "max"):
+        return np.where(best == fill, np.nan, best)
+    return location
@@ -13,6 +13,9 @@ setuptools.setup(
     url="https://github.com/acollu/me_calculator",
     #packages=setuptools.find_packages(),
     packages=['me_calculator'],
+    entry_points={
+        "console_scripts": ["me-calculator=me_calculator.me_calculator_cli:main"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
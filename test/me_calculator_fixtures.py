@@ -0,0 +1,21 @@
+from me_calculator.me_calculator import MeCalculator
+
+# The scenario the MeCalculator tests are written against; keyword arguments override its values
+calculator_arguments = {"points": 0.,
+                        "cost_per_point": 0.01,
+                        "discount_per_point": 0.025,
+                        "downpayment": 0.2,
+                        "closing_costs": 0.06,
+                        "mortgage_payment": 76000,
+                        "mortgage_duration": 30.,
+                        "mortgage_principal": 1200000,
+                        "mortgage_interest_rate": 0.03,
+                        "escrow_rate": 0.02,
+                        "property_value_growth_rate": 0.07,
+                        "pmi_insurance": 0.000075,
+                        "price_to_rent_ratio": 32,
+                        "market_rate_of_return": 0.07}
+
+
+def example_calculator(**arguments):
+    return MeCalculator(**dict(calculator_arguments, **arguments))
@@ -1,6 +1,10 @@
 import unittest
 
+import numpy as np
+
 from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_errors import PlottableNotDependentOnParameter, UnknownPlottable
+from test.me_calculator_fixtures import example_calculator
 
 class TestMeCalculatorFunctions(unittest.TestCase):
     def setUp(self):
@@ -73,8 +77,19 @@ class TestMeCalculatorFunctions(unittest.TestCase):
         mortgage_duration = 26.5
         mortgage_principal = 1000000.
         mortgage_interest_rate = self.functions.mortgage_interest_rate(downpayment, mortgage_payment, mortgage_duration, mortgage_principal) 
-        interest_rate = 0.03
-        self.assertAlmostEqual(mortgage_interest_rate, interest_rate, 5)
+        expected_mortgage_payment = self.functions.mortgage_payment(downpayment, mortgage_duration, mortgage_principal, mortgage_interest_rate)
+        self.assertAlmostEqual(mortgage_interest_rate, 0.0296316, 6)
+        self.assertAlmostEqual(mortgage_payment, expected_mortgage_payment, 4)
+
+    def test_mortgage_interest_rate_batch(self):
+        downpayment = 0.2
+        mortgage_duration = np.array([10., 20., 30.])
+        mortgage_principal = np.array([[500000.], [1000000.]])
+        mortgage_interest_rate = np.array([0.01, 0.12, 0.45])
+        mortgage_payment = self.functions.mortgage_payment(downpayment, mortgage_duration, mortgage_principal, mortgage_interest_rate)
+        solved = self.functions.mortgage_interest_rate(downpayment, mortgage_payment, mortgage_duration, mortgage_principal)
+        np.testing.assert_allclose(solved, np.broadcast_to(mortgage_interest_rate, (2, 3)), rtol=1e-8)
+        self.assertTrue(np.isnan(self.functions.mortgage_interest_rate(downpayment, 10000., 30., 1000000.)))
 
     def test_mortgage_duration(self):
         downpayment = 0.2
@@ -153,5 +168,135 @@ class TestMeCalculatorFunctions(unittest.TestCase):
         property_value = self.functions.property_value(downpayment, mortgage_principal, property_value_growth_rate, time)
         self.assertAlmostEqual(property_value, 2593742.46, 2)
 
+    def test_array_evaluation(self):
+        downpayment = 0.2
+        mortgage_payment = np.array([70000., 80000., 90000.])
+        mortgage_principal = 1000000.
+        mortgage_interest_rate = np.array([[0.02], [0.035]])
+        time = 5.
+        durations = self.functions.mortgage_duration(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate)
+        self.assertEqual(durations.shape, (2, 3))
+        interest_paid = self.functions.mortgage_interest_paid(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
+        for i in range(2):
+            for j in range(3):
+                expected = self.functions.mortgage_interest_paid(downpayment, mortgage_payment[j], mortgage_principal, mortgage_interest_rate[i][0], time)
+                self.assertAlmostEqual(interest_paid[i][j], expected, 6)
+
+    def test_array_out_of_domain(self):
+        downpayment = 0.2
+        mortgage_payment = 80000.
+        mortgage_principal = 1000000.
+        mortgage_interest_rate = 0.03
+        time = np.array([10., 100.])
+        self.assertTrue(np.isnan(self.functions.mortgage_principal_residual(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, 100.)))
+        residual = self.functions.mortgage_principal_residual(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
+        self.assertTrue(np.isfinite(residual[0]))
+        self.assertTrue(np.isnan(residual[1]))
+        # Payments that never repay the principal, or a zero rate, give NaN instead of raising
+        self.assertTrue(np.isnan(self.functions.mortgage_duration(downpayment, 20000., mortgage_principal, mortgage_interest_rate)))
+        self.assertTrue(np.isnan(self.functions.mortgage_escrow_paid(downpayment, mortgage_payment, mortgage_principal, 0., 10.)))
+
+    def test_valid(self):
+        downpayment = 0.2
+        mortgage_payment = np.array([[20000.], [80000.]])
+        mortgage_principal = 1000000.
+        mortgage_interest_rate = 0.03
+        time = np.array([10., 100.])
+        valid = self.functions.valid("total_cost_residual", downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
+        np.testing.assert_array_equal(valid, [[False, False], [True, False]])
+        values = self.functions.total_cost_residual(downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time)
+        np.testing.assert_array_equal(np.isfinite(values), valid)
+        self.assertTrue(self.functions.valid("accrued_costs", downpayment, 20000., mortgage_principal, mortgage_interest_rate, 100.))
+
+class TestMeCalculator(unittest.TestCase):
+    def setUp(self):
+        self.calculator = example_calculator()
+
+    def test_data_1d(self):
+        x, y, valid = self.calculator.data_1d("time", "mortgage_principal_residual", resolution=300, x_range=(0., 60.))
+        self.assertEqual(x.shape, (300,))
+        self.assertTrue(valid[0])
+        self.assertFalse(valid[-1])
+        self.assertTrue(np.all(np.isnan(y[~valid])))
+        functions = self.calculator.functions
+        for i in range(0, 300, 37):
+            if valid[i]:
+                self.assertAlmostEqual(y[i], functions.mortgage_principal_residual(0.2, 76000, 1200000, 0.03, x[i]), 6)
+
+    def test_goal_seek(self):
+        functions = self.calculator.functions
+        # When buying starts to beat renting, on a grid of payments and downpayments
+        axes, break_even = self.calculator.goal_seek("time", ["home_purchase_net_return", "no_home_purchase_total_return"],
+                                                     parameters=["mortgage_payment", "downpayment"], resolution=[4, 4])
+        self.assertEqual(break_even.shape, (4, 4))
+        self.assertTrue(np.isnan(break_even[0][0]))
+        payment, downpayment = np.meshgrid(axes[0], axes[1], indexing="ij")
+        valid = np.isfinite(break_even)
+        self.assertGreater(np.count_nonzero(valid), 4)
+        buy = functions.home_purchase_net_return(downpayment, payment, 1200000, 0.03, break_even)
+        rent = functions.no_home_purchase_total_return(downpayment, payment, 1200000, 0.03, break_even)
+        np.testing.assert_allclose(buy[valid], rent[valid], rtol=1e-8)
+        # Renting still wins a bit earlier
+        earlier = break_even - 0.01
+        self.assertTrue(np.all(functions.home_purchase_net_return(downpayment, payment, 1200000, 0.03, earlier)[valid] <
+                               functions.no_home_purchase_total_return(downpayment, payment, 1200000, 0.03, earlier)[valid]))
+        # Single plottable against a target
+        axes, time = self.calculator.goal_seek("time", ["mortgage_principal_paid"], target=600000., x_range=(0., 60.))
+        self.assertEqual(axes, [])
+        self.assertEqual(self.calculator.goal_seek("time", ["mortgage_principal_paid"], target=600000., parameters=None, x_range=(0., 60.))[1], time)
+        self.assertAlmostEqual(functions.mortgage_principal_paid(0.2, 76000, 1200000, 0.03, time), 600000., 4)
+        self.assertTrue(np.isnan(self.calculator.goal_seek("time", ["mortgage_principal_paid"], target=600000.)[1]))
+        with self.assertRaises(PlottableNotDependentOnParameter):
+            self.calculator.goal_seek("time", ["mortgage_principal_paid"], parameters=["property_value_growth_rate"])
+        with self.assertRaises(ValueError):
+            self.calculator.goal_seek("time", ["home_purchase_net_return", "no_home_purchase_total_return", "accrued_costs"])
+        with self.assertRaises(ValueError):
+            self.calculator.goal_seek("time", [])
+
+    def test_valid_range(self):
+        duration = self.calculator.functions.mortgage_duration(0.2, 76000, 1200000, 0.03)
+        lower, upper = self.calculator.valid_range("time", "mortgage_principal_residual", x_range=(0., 60.))
+        self.assertEqual(lower, 0.)
+        self.assertAlmostEqual(upper, duration, 9)
+        self.assertEqual(self.calculator.valid_range("time", "accrued_costs"), (0., 30.))
+        self.assertIsNone(self.calculator.valid_range("time", "mortgage_paid", x_range=(60., 90.)))
+        # Larger principals are never repaid by the same payment
+        lower, upper = self.calculator.valid_range("mortgage_principal", "mortgage_duration")
+        self.assertTrue(np.isfinite(self.calculator.functions.mortgage_duration(0.2, 76000, upper, 0.03)))
+        self.assertTrue(np.isnan(self.calculator.functions.mortgage_duration(0.2, 76000, upper * (1. + 1e-12), 0.03)))
+
+    def test_data_2d(self):
+        x, y, z, valid = self.calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(40, 30))
+        self.assertEqual(z.shape, (30, 40))
+        self.assertEqual(x.shape, z.shape)
+        i, j = 2, 5
+        expected = self.calculator.functions.mortgage_interest_paid(0.2, 76000, x[i][j], 0.03, y[i][j])
+        self.assertAlmostEqual(z[i][j], expected, 6)
+        self.assertTrue(valid[i][j])
+
+    def test_data_nd(self):
+        axes, values, valid = self.calculator.data_nd(["downpayment", "mortgage_interest_rate", "time"], "mortgage_paid", resolution=[4, 5, 6])
+        self.assertEqual([len(axis) for axis in axes], [4, 5, 6])
+        self.assertEqual(values.shape, (4, 5, 6))
+        self.assertEqual(valid.shape, (4, 5, 6))
+        self.assertAlmostEqual(values[1][1][3], axes[2][3] * 76000, 6)
+        # At 8% the payment net of escrow does not cover the interest, the mortgage is never repaid
+        self.assertFalse(valid[1][2][3])
+
+    def test_plottable_registry(self):
+        plottables = MeCalculatorFunctions.plottables
+        self.assertEqual(set(plottables), set(self.calculator.mortgage_plottables))
+        self.assertEqual(plottables["mortgage_payment"].arguments, ("downpayment", "mortgage_duration", "mortgage_principal", "mortgage_interest_rate"))
+        self.assertEqual(plottables["mortgage_paid"].domain, ("amortizing", "within_duration"))
+        self.assertEqual(self.calculator.mortgage_plottables["mortgage_duration"], [" [years]"])
+        functions = self.calculator.functions
+        self.assertEqual(functions.evaluate("mortgage_paid", 0.2, 76000, 1200000, 0.03, 10.), functions.mortgage_paid(0.2, 76000, 1200000, 0.03, 10.))
+
+    def test_data_argument_checks(self):
+        with self.assertRaises(UnknownPlottable):
+            self.calculator.data_1d("time", "not_a_plottable")
+        with self.assertRaises(PlottableNotDependentOnParameter):
+            self.calculator.data_nd(["time", "mortgage_duration"], "mortgage_paid")
+
 if __name__ == '__main__':
     unittest.main()
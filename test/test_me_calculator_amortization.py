@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_amortization import amortization_schedule, amortization_schedule_chunks
+
+
+class TestMeCalculatorAmortization(unittest.TestCase):
+    def setUp(self):
+        self.functions = MeCalculatorFunctions(closing_costs=0.06, escrow_rate=0.02)
+
+    def test_yearly_schedule_matches_mortgage_payment(self):
+        schedule = amortization_schedule(self.functions, 0.2, [500000., 1000000.], [0.03, 0.05], [30., 15.], periods_per_year=1)
+        self.assertEqual(schedule.payment.shape, (2, 30))
+        for loan, (principal, rate, duration) in enumerate([(500000., 0.03, 30.), (1000000., 0.05, 15.)]):
+            expected = self.functions.mortgage_payment(0.2, duration, principal, rate)
+            np.testing.assert_allclose(schedule.payment[loan][:int(duration)], expected)
+            self.assertAlmostEqual(schedule.principal[loan].sum(), principal, 4)
+            self.assertEqual(schedule.balance[loan][int(duration) - 1], 0.)
+        self.assertTrue(np.all(schedule.payment[1][15:] == 0.))
+        np.testing.assert_allclose(schedule.closing_costs, [30000., 60000.])
+
+    def test_monthly_schedule(self):
+        principal = 300000.
+        schedule = amortization_schedule(self.functions, 0.1, principal, 0.06, 30.)
+        # Reference monthly payment of a 30 years 6% loan
+        self.assertAlmostEqual(schedule.payment[0][0] - schedule.escrow[0][0], 1798.65, 2)
+        self.assertAlmostEqual(schedule.interest[0][0], principal * 0.005, 6)
+        balance = principal
+        for period in range(360):
+            balance -= schedule.principal[0][period]
+            self.assertAlmostEqual(schedule.balance[0][period], balance, 4)
+
+    def test_chunks_and_float32(self):
+        principals = np.linspace(100000., 900000., 25)
+        schedule = amortization_schedule(self.functions, 0.2, principals, 0.04, 20.)
+        for start, chunk in amortization_schedule_chunks(self.functions, 0.2, principals, 0.04, 20., dtype=np.float32, chunk_size=10):
+            self.assertEqual(chunk.balance.dtype, np.float32)
+            np.testing.assert_allclose(chunk.balance, schedule.balance[start:start + 10], rtol=1e-5, atol=1e-2)
+        structured = schedule.as_structured()
+        np.testing.assert_array_equal(structured["interest"], schedule.interest)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_batch import MeCalculatorBatch, MeCalculatorFunctionsCache
+from me_calculator.me_calculator_cli import main
+from me_calculator.me_calculator_errors import UnknownPlottable
+
+scenarios_csv = """downpayment,mortgage_payment,mortgage_principal,mortgage_interest_rate,time,escrow_rate,closing_costs
+0.2,80000,1000000,0.03,5,0.02,0.06
+0.1,70000,800000,0.04,10,,0.06
+0.2,80000,1000000,0.03,50,0.02,0.06
+0.3,90000,1200000,0.05,1,0.01,
+"""
+
+
+class TestMeCalculatorBatch(unittest.TestCase):
+    def test_evaluate_csv(self):
+        output = io.StringIO()
+        batch = MeCalculatorBatch(["mortgage_interest_paid", "no_home_purchase_total_return"], chunk_size=3)
+        report = batch.evaluate_csv(io.StringIO(scenarios_csv), output)
+        self.assertEqual(report.rows, 4)
+        self.assertGreater(report.rows_per_second, 0.)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(len(rows), 4)
+        expected = MeCalculatorFunctions(escrow_rate=0.02, closing_costs=0.06).mortgage_interest_paid(0.2, 80000., 1000000., 0.03, 5.)
+        self.assertAlmostEqual(float(rows[0]["mortgage_interest_paid"]), expected, 6)
+        expected = MeCalculatorFunctions(escrow_rate=None, closing_costs=0.06).no_home_purchase_total_return(0.1, 70000., 800000., 0.04, 10.)
+        self.assertAlmostEqual(float(rows[1]["no_home_purchase_total_return"]), expected, 6)
+        self.assertTrue(np.isnan(float(rows[2]["mortgage_interest_paid"])))
+        expected = MeCalculatorFunctions(escrow_rate=0.01).mortgage_interest_paid(0.3, 90000., 1200000., 0.05, 1.)
+        self.assertAlmostEqual(float(rows[3]["mortgage_interest_paid"]), expected, 6)
+
+    def test_varying_configurations(self):
+        # Configurations differing on every row are evaluated as arrays, not one by one nor cached
+        random = np.random.default_rng(0)
+        rows = 1000
+        columns = {"downpayment": np.full(rows, 0.2), "mortgage_payment": random.uniform(60000., 100000., rows), "mortgage_principal": np.full(rows, 1000000.),
+                   "mortgage_interest_rate": np.full(rows, 0.03), "time": random.uniform(0., 30., rows), "escrow_rate": random.uniform(0.005, 0.02, rows),
+                   "closing_costs": np.full(rows, 0.06)}
+        columns["escrow_rate"][::7] = np.nan
+        batch = MeCalculatorBatch(["mortgage_interest_paid", "total_cost"])
+        interest_paid, total_cost = batch.evaluate_columns(columns)
+        self.assertEqual(len(batch.functions), 0)
+        for row in (0, 1, 7, 500):
+            escrow_rate = columns["escrow_rate"][row]
+            functions = MeCalculatorFunctions(escrow_rate=None if np.isnan(escrow_rate) else escrow_rate, closing_costs=0.06)
+            arguments = (0.2, columns["mortgage_payment"][row], 1000000., 0.03)
+            np.testing.assert_allclose(interest_paid[row], functions.mortgage_interest_paid(*arguments, columns["time"][row]), equal_nan=True)
+            np.testing.assert_allclose(total_cost[row], functions.total_cost(*arguments))
+
+    def test_functions_cache(self):
+        cache = MeCalculatorFunctionsCache(defaults={"closing_costs": 0.05}, max_size=2)
+        first = cache.get({"escrow_rate": 0.01})
+        self.assertIs(cache.get({"escrow_rate": 0.01}), first)
+        self.assertEqual(first.closing_costs, 0.05)
+        self.assertFalse(cache.get({"escrow_rate": np.nan}).include_escrow_expenses)
+        cache.get({"escrow_rate": 0.02})
+        # Least recently used first out
+        self.assertEqual(len(cache), 2)
+        self.assertIsNot(cache.get({"escrow_rate": 0.01}), first)
+
+    def test_unknown_plottable(self):
+        with self.assertRaises(UnknownPlottable):
+            MeCalculatorBatch(["not_a_plottable"])
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "scenarios.csv")
+            output_path = os.path.join(directory, "results.csv")
+            with open(input_path, "w") as input_file:
+                input_file.write(scenarios_csv)
+            self.assertEqual(main(["batch", input_path, output_path, "-p", "mortgage_paid", "--chunk-size", "2"]), 0)
+            with open(output_path) as output_file:
+                rows = list(csv.DictReader(output_file))
+        self.assertAlmostEqual(float(rows[0]["mortgage_paid"]), 400000., 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_benchmarks import benchmarks, find_regressions, run_benchmarks
+from me_calculator.me_calculator_cli import main
+
+
+class TestMeCalculatorBenchmarks(unittest.TestCase):
+    def test_every_plottable_is_benchmarked(self):
+        names = benchmarks(batch_size=10, resolution=10)
+        for plottable in MeCalculatorFunctions.plottables:
+            self.assertIn("scalar." + plottable, names)
+            self.assertIn("batch." + plottable, names)
+        self.assertIn("data_2d.mortgage_interest_paid", names)
+        for name, function in names.items():
+            function()
+
+    def test_run_and_compare(self):
+        results = run_benchmarks(batch_size=100, resolution=20, repeat=2, min_time=0.001, names=["batch.mortgage_paid", "data_1d.mortgage_interest_paid"])
+        self.assertEqual(sorted(results["benchmarks"]), ["batch.mortgage_paid", "data_1d.mortgage_interest_paid"])
+        self.assertEqual(find_regressions(results, results), {})
+        baseline = dict(results, benchmarks={name: seconds / 10. for name, seconds in results["benchmarks"].items()})
+        regressions = find_regressions(results, baseline, threshold=0.5)
+        self.assertEqual(sorted(regressions), ["batch.mortgage_paid", "data_1d.mortgage_interest_paid"])
+        # Benchmarks of the baseline missing from the run are reported, unless left out on purpose
+        baseline["benchmarks"]["batch.total_cost"] = 1.
+        self.assertEqual(find_regressions(results, baseline, threshold=100.), {"batch.total_cost": (1., None, None)})
+        self.assertEqual(find_regressions(results, baseline, threshold=100., names=["batch.mortgage_paid"]), {})
+        # Times of runs with other sizes are not comparable
+        with self.assertRaises(ValueError):
+            find_regressions(results, dict(results, parameters=dict(results["parameters"], batch_size=100000)))
+        with self.assertRaises(ValueError):
+            find_regressions(results, {"benchmarks": results["benchmarks"]})
+
+    def test_cli_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline_path = os.path.join(directory, "baseline.json")
+            with open(baseline_path, "w") as baseline_file:
+                json.dump({"benchmarks": {"batch.mortgage_paid": 1e-12}, "parameters": {"batch_size": 10000, "resolution": 200}}, baseline_file)
+            with redirect_stdout(io.StringIO()) as output:
+                status = main(["bench", "--quick", "--only", "batch.mortgage_paid", "-b", baseline_path, "-o", os.path.join(directory, "results.json")])
+            self.assertEqual(status, 1)
+            self.assertIn("REGRESSION", output.getvalue())
+            self.assertTrue(os.path.exists(os.path.join(directory, "results.json")))
+
+    def test_cli_refuses_other_sizes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline_path = os.path.join(directory, "baseline.json")
+            with open(baseline_path, "w") as baseline_file:
+                json.dump({"benchmarks": {"batch.mortgage_paid": 1.}, "parameters": {"batch_size": 100000, "resolution": 1000}}, baseline_file)
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()) as errors:
+                status = main(["bench", "--quick", "--only", "batch.mortgage_paid", "-b", baseline_path])
+            self.assertEqual(status, 1)
+            self.assertIn("batch_size=100000", errors.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
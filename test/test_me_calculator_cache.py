@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator_cache import MeCalculatorCache
+from test.me_calculator_fixtures import example_calculator
+
+
+class TestMeCalculatorCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = MeCalculatorCache(self.directory.name, max_bytes=2000)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        values = np.arange(12.).reshape(3, 4)
+        key = self.cache.key(plottable="mortgage_paid", resolution=[3, 4])
+        self.assertEqual(key, self.cache.key(resolution=[3, 4], plottable="mortgage_paid"))
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, values)
+        cached = self.cache.get(key)
+        self.assertIsInstance(cached, np.memmap)
+        self.assertFalse(cached.flags.writeable)
+        np.testing.assert_array_equal(cached, values)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertFalse([name for name in os.listdir(self.directory.name) if name.endswith(".tmp")])
+
+    def test_lru_eviction(self):
+        # Each file is 928 bytes (128 bytes of header), two fit in max_bytes
+        for name in ["a", "b"]:
+            self.cache.put(name, np.zeros(100))
+        os.utime(os.path.join(self.directory.name, "a.npy"), (0, 0))
+        os.utime(os.path.join(self.directory.name, "b.npy"), (1, 1))
+        self.cache.get("a")
+        self.cache.put("c", np.zeros(100))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("c"))
+        self.assertLessEqual(self.cache.size(), 2000)
+
+    def test_calculator(self):
+        calculator = example_calculator()
+        calculator.cache = MeCalculatorCache(self.directory.name)
+        x, y, z, valid = calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(40, 30))
+        self.assertEqual(calculator.cache.misses, 1)
+        _, _, cached_z, cached_valid = calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(40, 30))
+        self.assertEqual(calculator.cache.hits, 1)
+        np.testing.assert_array_equal(cached_z, z)
+        np.testing.assert_array_equal(cached_valid, valid)
+        # Any change of the grid, the fixed arguments or the configuration is a different entry
+        calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(40, 31))
+        calculator.mortgage_parameters["downpayment"][0] = 0.25
+        calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(40, 30))
+        calculator.functions.closing_costs = 0.05
+        calculator.data_nd(["mortgage_principal", "time"], "mortgage_interest_paid", resolution=[40, 30])
+        calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(40, 30))
+        self.assertEqual((calculator.cache.hits, calculator.cache.misses), (1, 5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+
+
+class TestMeCalculatorDerivatives(unittest.TestCase):
+    def setUp(self):
+        self.functions = MeCalculatorFunctions(cost_per_point=0.01,
+                                               discount_per_point=0.0025,
+                                               closing_costs=0.06,
+                                               escrow_rate=0.02,
+                                               property_value_growth_rate=0.05,
+                                               pmi_insurance=0.000075,
+                                               price_to_rent_ratio=25.,
+                                               market_rate_of_return=0.06)
+        self.scenario = {"downpayment": 0.2, "mortgage_payment": 80000., "mortgage_duration": 30., "mortgage_principal": 1000000.,
+                         "mortgage_interest_rate": 0.03, "property_value_growth_rate": 0.05, "time": 10.}
+
+    def test_finite_differences(self):
+        for plottable, registered in self.functions.plottables.items():
+            arguments = [self.scenario[argument] for argument in registered.arguments]
+            if plottable == "mortgage_interest_rate":
+                arguments[1] = self.functions.mortgage_payment(0.2, 30., 1000000., 0.03)
+            value, derivatives = self.functions.jacobian(plottable, *arguments)
+            self.assertAlmostEqual(value, self.functions.evaluate(plottable, *arguments), 6)
+            self.assertEqual(list(derivatives), list(registered.arguments))
+            for i, argument in enumerate(registered.arguments):
+                step = 1e-6 * arguments[i]
+                above, below = list(arguments), list(arguments)
+                above[i] += step
+                below[i] -= step
+                expected = (self.functions.evaluate(plottable, *above) - self.functions.evaluate(plottable, *below)) / (2. * step)
+                self.assertAlmostEqual(derivatives[argument], expected, delta=1e-5 * (abs(expected) + 1e-6 * abs(value)) + 1e-9,
+                                       msg=plottable + " / " + argument)
+
+    def test_batch(self):
+        mortgage_interest_rate = np.array([0.02, 0.03, 0.04])
+        time = np.array([[5.], [15.], [100.]])
+        value, derivatives = self.functions.jacobian("total_cost_residual", 0.2, 80000., 1000000., mortgage_interest_rate, time,
+                                                     with_respect_to=["mortgage_interest_rate", "time"])
+        self.assertEqual(sorted(derivatives), ["mortgage_interest_rate", "time"])
+        self.assertEqual(value.shape, (3, 3))
+        self.assertEqual(derivatives["time"].shape, (3, 3))
+        np.testing.assert_allclose(value, self.functions.total_cost_residual(0.2, 80000., 1000000., mortgage_interest_rate, time))
+        for i in range(2):
+            for j in range(3):
+                _, expected = self.functions.jacobian("total_cost_residual", 0.2, 80000., 1000000., mortgage_interest_rate[j], time[i][0])
+                self.assertAlmostEqual(derivatives["mortgage_interest_rate"][i][j], expected["mortgage_interest_rate"], 4)
+        # Out of domain derivatives are NaN, like the values
+        self.assertTrue(np.all(np.isnan(derivatives["time"][2])))
+
+    def test_independent_argument(self):
+        value, derivatives = self.functions.jacobian("accrued_costs", 0.2, 80000., 1000000., 0.03, 10., with_respect_to=["mortgage_interest_rate"])
+        self.assertEqual(derivatives, {"mortgage_interest_rate": 0.})
+        self.assertAlmostEqual(value, self.functions.accrued_costs(0.2, 80000., 1000000., 0.03, 10.), 6)
+
+if __name__ == '__main__':
+    unittest.main()
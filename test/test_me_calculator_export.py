@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator_batch import MeCalculatorBatch
+from me_calculator.me_calculator_cli import main
+from me_calculator.me_calculator_export import MeCalculatorExport, export_sweep, load_export
+from test.me_calculator_fixtures import example_calculator
+from test.test_me_calculator_batch import scenarios_csv
+
+
+class TestMeCalculatorExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "export.npz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_incremental(self):
+        with MeCalculatorExport(self.path, dtype=np.float32, metadata={"source": "test"}) as export:
+            export.set_shape("grid", (3, 4))
+            for start in range(0, 3):
+                export.append({"grid": np.arange(4.) + 4 * start, "count": np.array([start])})
+        arrays, metadata = load_export(self.path)
+        self.assertEqual(metadata, {"source": "test"})
+        self.assertEqual(arrays["grid"].dtype, np.float32)
+        np.testing.assert_array_equal(arrays["grid"], np.arange(12.).reshape(3, 4))
+        np.testing.assert_array_equal(arrays["count"], [0, 1, 2])
+        self.assertEqual(os.listdir(self.directory.name), ["export.npz"])
+
+    def test_failed_export_leaves_nothing(self):
+        with self.assertRaises(ValueError):
+            with MeCalculatorExport(self.path) as export:
+                export.set_shape("grid", (3, 4))
+                export.append({"grid": np.arange(5.)})
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_sweep(self):
+        calculator = example_calculator()
+        calculator.export_nd(self.path, ["mortgage_principal", "mortgage_interest_rate", "time"], ["mortgage_interest_paid", "mortgage_paid"], resolution=[7, 3, 5])
+        arrays, metadata = load_export(self.path)
+        axes, values, valid = calculator.data_nd(["mortgage_principal", "mortgage_interest_rate", "time"], "mortgage_interest_paid", resolution=[7, 3, 5])
+        self.assertEqual(arrays["mortgage_interest_paid"].shape, (7, 3, 5))
+        self.assertEqual(arrays["mortgage_interest_paid"].dtype, np.float32)
+        np.testing.assert_allclose(arrays["mortgage_interest_paid"], values, rtol=1e-6, equal_nan=True)
+        np.testing.assert_allclose(arrays["axes/time"], axes[2], rtol=1e-6)
+        self.assertEqual(metadata["axes"][0], {"name": "mortgage_principal", "units": "$", "range": [100000., float(axes[0][-1])], "resolution": 7})
+        self.assertEqual(metadata["plottables"], {"mortgage_interest_paid": "$", "mortgage_paid": "$"})
+        self.assertEqual(metadata["fixed"], {"downpayment": 0.2, "mortgage_payment": 76000})
+        # Slabs of one row of the first axis give the same file content
+        small = os.path.join(self.directory.name, "small.npz")
+        export_sweep(calculator, small, ["mortgage_principal", "mortgage_interest_rate", "time"], ["mortgage_interest_paid"], resolution=[7, 3, 5], max_points=1)
+        np.testing.assert_array_equal(np.load(small)["mortgage_interest_paid"], arrays["mortgage_interest_paid"])
+
+    def test_batch(self):
+        batch = MeCalculatorBatch(["mortgage_interest_paid", "total_cost"], chunk_size=3)
+        report = batch.evaluate_csv_to_npz(io.StringIO(scenarios_csv), self.path)
+        self.assertEqual(report.rows, 4)
+        arrays, metadata = load_export(self.path)
+        output = io.StringIO()
+        batch.evaluate_csv(io.StringIO(scenarios_csv), output)
+        expected = np.array([row.split(",")[-2:] for row in output.getvalue().splitlines()[1:]], dtype=float)
+        np.testing.assert_array_equal(arrays["mortgage_interest_paid"], expected[:, 0])
+        np.testing.assert_array_equal(arrays["time"], [5., 10., 50., 1.])
+        self.assertTrue(np.isnan(arrays["escrow_rate"][1]))
+        self.assertEqual(metadata["kind"], "batch")
+        self.assertEqual(metadata["plottables"]["total_cost"], "$")
+        input_path = os.path.join(self.directory.name, "scenarios.csv")
+        with open(input_path, "w") as input_file:
+            input_file.write(scenarios_csv)
+        self.assertEqual(main(["batch", input_path, self.path, "-p", "mortgage_interest_paid", "--float32"]), 0)
+        self.assertEqual(np.load(self.path)["mortgage_interest_paid"].dtype, np.float32)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_montecarlo import MeCalculatorMonteCarlo
+
+
+class TestMeCalculatorMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        self.functions = MeCalculatorFunctions(closing_costs=0.06,
+                                               escrow_rate=0.02,
+                                               property_value_growth_rate=0.,
+                                               price_to_rent_ratio=32.,
+                                               market_rate_of_return=0.07)
+        self.scenario = (0.2, 76000., 1200000., 0.03)
+
+    def test_deterministic_limit(self):
+        # Without volatility (and with a flat rent) every path follows the closed forms
+        result = MeCalculatorMonteCarlo(self.functions, 0., 0., seed=1).simulate(*self.scenario, years=30, paths=100)
+        np.testing.assert_allclose(result.rent_mean, self.functions.no_home_purchase_total_return(*self.scenario, result.years))
+        np.testing.assert_allclose(result.buy_mean, self.functions.home_purchase_net_return(*self.scenario, result.years))
+        np.testing.assert_allclose(result.rent_percentiles[2], result.rent_mean, rtol=1e-6)
+
+    def test_reproducible_and_chunked(self):
+        self.functions.property_value_growth_rate = 0.04
+        first = MeCalculatorMonteCarlo(self.functions, correlation=0.3, seed=7).simulate(*self.scenario, years=20, paths=5000, chunk_size=5000)
+        second = MeCalculatorMonteCarlo(self.functions, correlation=0.3, seed=7).simulate(*self.scenario, years=20, paths=5000, chunk_size=1300)
+        np.testing.assert_allclose(first.buy_mean, second.buy_mean)
+        np.testing.assert_array_equal(first.probability_buy_wins, second.probability_buy_wins)
+        self.assertEqual(first.buy_percentiles.shape, (5, 20))
+        self.assertTrue(np.all(np.diff(first.buy_percentiles, axis=0) >= 0.))
+        self.assertTrue(np.all((first.probability_buy_wins >= 0.) & (first.probability_buy_wins <= 1.)))
+
+    def test_not_amortizing(self):
+        # The payment net of escrow does not cover the interest: the mortgage is never repaid
+        scenario = (0.2, 40000., 1200000., 0.03)
+        result = MeCalculatorMonteCarlo(self.functions, 0., 0., seed=1).simulate(*scenario, years=10, paths=100)
+        self.assertTrue(np.all(np.isnan(self.functions.home_purchase_net_return(*scenario, result.years))))
+        self.assertTrue(np.all(np.isnan(result.buy_mean)))
+        self.assertTrue(np.all(np.isnan(result.buy_percentiles)))
+        self.assertTrue(np.all(np.isnan(result.probability_buy_wins)))
+        np.testing.assert_allclose(result.rent_mean, self.functions.no_home_purchase_total_return(*scenario, result.years))
+
+if __name__ == '__main__':
+    unittest.main()
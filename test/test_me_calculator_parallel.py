@@ -0,0 +1,35 @@
+import io
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator_batch import MeCalculatorBatch
+from test.me_calculator_fixtures import example_calculator
+from test.test_me_calculator_batch import scenarios_csv
+
+
+class TestMeCalculatorParallel(unittest.TestCase):
+    def setUp(self):
+        self.calculator = example_calculator()
+
+    def test_parallel_grid_matches_serial(self):
+        x, y, serial, valid = self.calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(50, 70))
+        for executor in ("thread", "process"):
+            self.calculator.workers = 3
+            self.calculator.executor = executor
+            x, y, parallel, valid = self.calculator.data_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(50, 70))
+            np.testing.assert_array_equal(parallel, serial)
+        axes, serial, valid = self.calculator.data_nd(["downpayment", "mortgage_interest_rate", "time"], "total_cost_residual", resolution=[5, 6, 7])
+        self.calculator.workers = 4
+        axes, parallel, valid = self.calculator.data_nd(["downpayment", "mortgage_interest_rate", "time"], "total_cost_residual", resolution=[5, 6, 7])
+        np.testing.assert_array_equal(parallel, serial)
+
+    def test_parallel_batch_matches_serial(self):
+        serial = io.StringIO()
+        MeCalculatorBatch(["mortgage_interest_paid"], chunk_size=1).evaluate_csv(io.StringIO(scenarios_csv), serial)
+        parallel = io.StringIO()
+        MeCalculatorBatch(["mortgage_interest_paid"], chunk_size=1, workers=3).evaluate_csv(io.StringIO(scenarios_csv), parallel)
+        self.assertEqual(parallel.getvalue(), serial.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import io
+import json
+import unittest
+
+from me_calculator import me_calculator_profiling
+from me_calculator.me_calculator_batch import MeCalculatorBatch
+from me_calculator.me_calculator_profiling import profiling
+from test.me_calculator_fixtures import example_calculator
+from test.test_me_calculator_batch import scenarios_csv
+
+
+class TestMeCalculatorProfiling(unittest.TestCase):
+    def test_sweep_counts(self):
+        calculator = example_calculator()
+        events = []
+        with profiling(callback=lambda section, name, seconds: events.append(section)) as profile:
+            calculator.data_1d_plottables("time", ["mortgage_principal_residual", "mortgage_interest_paid"], resolution=100, x_range=(0., 60.))
+        summary = profile.summary()
+        self.assertEqual(summary["plottables"]["mortgage_interest_paid"]["evaluations"], 100)
+        # The mortgage lasts about 51.6 years: the last samples are out of domain
+        self.assertEqual(summary["plottables"]["mortgage_principal_residual"]["rejections"], 13)
+        self.assertEqual(summary["timings"]["validation"]["calls"], 1)
+        self.assertEqual(summary["timings"]["evaluation"]["calls"], 1)
+        # Shared intermediates are computed once for both plottables
+        self.assertEqual(summary["intermediates"]["duration"], 1)
+        self.assertIn("evaluation", events)
+        self.assertEqual(json.loads(profile.to_json()), summary)
+        self.assertIsNone(me_calculator_profiling.profiler)
+
+    def test_batch_counts(self):
+        with profiling() as profile:
+            MeCalculatorBatch(["mortgage_paid"]).evaluate_csv(io.StringIO(scenarios_csv), io.StringIO())
+        summary = profile.summary()
+        self.assertEqual(summary["plottables"]["mortgage_paid"], {"evaluations": 4, "rejections": 1})
+        self.assertEqual(summary["timings"]["evaluation"]["calls"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
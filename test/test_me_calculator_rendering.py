@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+import matplotlib
+matplotlib.use("Agg")
+
+from me_calculator.me_calculator_errors import UnknownParameter, UnknownPlottable
+from me_calculator.me_calculator_rendering import max_surface_resolution, surface_resolution
+from test.me_calculator_fixtures import example_calculator
+
+png_signature = b"\x89PNG\r\n\x1a\n"
+
+
+class TestMeCalculatorRendering(unittest.TestCase):
+    def setUp(self):
+        self.calculator = example_calculator()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_render_bytes(self):
+        for kind in ("heatmap", "contour", "surface"):
+            png = self.calculator.render_2d("mortgage_principal", "time", "mortgage_interest_paid", kind=kind, resolution=40)
+            self.assertTrue(png.startswith(png_signature))
+            svg = self.calculator.render_2d("mortgage_principal", "time", "mortgage_interest_paid", kind=kind, format="svg", resolution=40)
+            self.assertIn(b"<svg", svg[:1000])
+        self.assertTrue(self.calculator.render_1d("time", ["mortgage_principal_paid", "accrued_costs"], resolution=50).startswith(png_signature))
+        with self.assertRaises(ValueError):
+            self.calculator.render_2d("mortgage_principal", "time", "mortgage_interest_paid", kind="bars")
+        with self.assertRaises(UnknownPlottable):
+            self.calculator.render_1d("time", ["not_a_plottable"])
+
+    def test_render_path(self):
+        path = os.path.join(self.directory.name, "surface.svg")
+        self.assertEqual(self.calculator.render_2d("mortgage_principal", "time", "mortgage_interest_paid", kind="surface", path=path), path)
+        with open(path, "rb") as svg:
+            self.assertIn(b"<svg", svg.read(1000))
+
+    def test_surface_level_of_detail(self):
+        self.assertEqual(surface_resolution(1000), max_surface_resolution)
+        self.assertEqual(surface_resolution((1000, 20)), (max_surface_resolution, 20))
+        # Interactive plots go through the same builders (fig.gca(projection="3d") no longer exists)
+        import matplotlib.pyplot as plt
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            self.calculator.plot_2d("mortgage_principal", "time", "mortgage_interest_paid")
+            self.calculator.plot_1d("time", ["mortgage_principal_paid"])
+        plt.close("all")
+
+    def test_render_batch(self):
+        jobs = [{"x_parameter": "mortgage_principal", "y_parameter": "time", "z_plottable": "mortgage_interest_paid", "resolution": 30,
+                 "scenario": {"mortgage_interest_rate": rate}} for rate in (0.02, 0.04)]
+        jobs.append({"x_parameter": "time", "y_plottables": ["mortgage_principal_paid"], "name": "paid", "format": "svg", "resolution": 50})
+        paths = self.calculator.render_batch(jobs, self.directory.name, workers=2)
+        self.assertEqual([os.path.basename(path) for path in paths], ["0-mortgage_interest_paid.png", "1-mortgage_interest_paid.png", "paid.svg"])
+        contents = []
+        for path in paths:
+            with open(path, "rb") as rendered:
+                contents.append(rendered.read())
+        self.assertTrue(contents[0].startswith(png_signature))
+        self.assertNotEqual(contents[0], contents[1])
+        # Scenarios only apply to their own figure
+        self.assertEqual(self.calculator.mortgage_parameters["mortgage_interest_rate"][0], 0.03)
+        with self.assertRaises(UnknownParameter):
+            self.calculator.render_batch([dict(jobs[0], scenario={"rate": 0.01})], self.directory.name, workers=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
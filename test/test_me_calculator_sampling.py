@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator_sampling import adaptive_1d, adaptive_2d
+from test.me_calculator_fixtures import example_calculator
+
+
+class TestMeCalculatorSampling(unittest.TestCase):
+    def test_straight_line_needs_no_refinement(self):
+        x, y, valid = adaptive_1d(lambda x: 3. * x + 1., 0., 30., initial_points=17)
+        self.assertEqual(len(x), 17)
+        self.assertTrue(np.all(valid))
+
+    def test_boundary_is_bracketed(self):
+        x, y, valid = adaptive_1d(lambda x: np.where(x < 17.3, np.sin(x), np.nan), 0., 30., boundary_tolerance=1e-6)
+        self.assertLess(x[~valid].min() - x[valid].max(), 1e-6)
+        self.assertLess(x[valid].max(), 17.3)
+        # Linear interpolation of the samples stays close to the curve (tolerance relative to its range of 2)
+        grid = np.linspace(0., 17.29, 5000)
+        self.assertLess(np.max(np.abs(np.interp(grid, x[valid], y[valid]) - np.sin(grid))), 5e-3)
+
+    def test_budget(self):
+        x, y, valid = adaptive_1d(lambda x: np.sin(50. * x), 0., 30., max_evaluations=200)
+        self.assertLessEqual(len(x), 200)
+        x, y, z, valid = adaptive_2d(lambda x, y: np.where(y < 30. - x, x * x + y, np.nan), 0., 30., 0., 30., max_evaluations=5000)
+        self.assertLessEqual(z.size, 5000)
+        self.assertEqual(z.shape, (len(y), len(x)))
+        # Budgets below the initial 17 x 17 grid shrink it
+        for max_evaluations in (100, 290, 3):
+            x, y, z, valid = adaptive_2d(lambda x, y: np.where(y < 30. - x, x * x + y, np.nan), 0., 30., 0., 30., max_evaluations=max_evaluations)
+            self.assertLessEqual(z.size, max_evaluations)
+
+    def test_adaptive_data(self):
+        calculator = example_calculator()
+        x, y, valid = calculator.adaptive_data_1d("mortgage_principal", "mortgage_duration")
+        self.assertLess(len(x), 1000)
+        expected = calculator.functions.mortgage_duration(0.2, 76000, x[valid], 0.03)
+        np.testing.assert_allclose(y[valid], expected)
+        # The duration diverges where the payment only covers the interest
+        self.assertTrue(valid[0])
+        self.assertFalse(valid[-1])
+        x, y, z, valid = calculator.adaptive_data_2d("mortgage_principal", "time", "mortgage_principal_residual", max_evaluations=20000)
+        self.assertEqual(x.shape, z.shape)
+        x, y, z, valid = calculator.adaptive_data_2d("mortgage_principal", "time", "mortgage_principal_residual", max_evaluations=100)
+        self.assertLessEqual(z.size, 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import math
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+import me_calculator.me_calculator_scenario as me_calculator_scenario
+
+# Configuration of the tests
+cost_per_point, discount_per_point, closing_costs, escrow_rate = 0.01, 0.0025, 0.06, 0.02
+property_value_growth_rate, pmi_insurance, price_to_rent_ratio, market_rate_of_return = 0.05, 0.000075, 20., 0.06
+
+
+def reference(plottable, downpayment, mortgage_payment, mortgage_principal, mortgage_interest_rate, time):
+    # The original formulas, one point at a time, NaN where they do not apply
+    home_price = mortgage_principal / (1. - downpayment)
+    escrow_expenses = escrow_rate * home_price
+    corrected_payment = mortgage_payment - escrow_expenses
+    base = 1. + mortgage_interest_rate
+    property_value = home_price * (1. + property_value_growth_rate) ** time
+    if plottable == "accrued_costs":
+        return downpayment * home_price + closing_costs * home_price + time * mortgage_payment
+    if plottable == "no_home_purchase_total_return":
+        rent = home_price / price_to_rent_ratio * (1. + property_value_growth_rate) ** time
+        market = 1. + market_rate_of_return
+        initial_capital = (downpayment + closing_costs) * home_price
+        return initial_capital * market ** time + (mortgage_payment - rent) * market / market_rate_of_return * (market ** time - 1.)
+    if corrected_payment <= mortgage_interest_rate * mortgage_principal:
+        return np.nan
+    duration = math.log(corrected_payment / (corrected_payment - mortgage_interest_rate * mortgage_principal)) / math.log(base)
+    if time > duration:
+        return np.nan
+    residual_principal = mortgage_principal * base ** time - corrected_payment * (base ** time - 1.) / mortgage_interest_rate
+    residual_interest = (duration - time) * corrected_payment - residual_principal
+    return {"mortgage_principal_residual": residual_principal,
+            "mortgage_principal_paid": mortgage_principal - residual_principal,
+            "mortgage_interest_paid": corrected_payment * duration - mortgage_principal - residual_interest,
+            "mortgage_escrow_paid": time * escrow_expenses,
+            "mortgage_paid": time * mortgage_payment,
+            "home_purchase_net_return": property_value * (1. - closing_costs) - residual_principal,
+            # total_cost_paid is the whole total_cost from the start
+            "total_cost_residual": 0.}[plottable]
+
+
+class TestMeCalculatorScenario(unittest.TestCase):
+    def setUp(self):
+        self.functions = MeCalculatorFunctions(cost_per_point=cost_per_point,
+                                               discount_per_point=discount_per_point,
+                                               closing_costs=closing_costs,
+                                               escrow_rate=escrow_rate,
+                                               property_value_growth_rate=property_value_growth_rate,
+                                               pmi_insurance=pmi_insurance,
+                                               price_to_rent_ratio=price_to_rent_ratio,
+                                               market_rate_of_return=market_rate_of_return)
+        self.inputs = {"downpayment": 0.2,
+                       "mortgage_payment": np.array([70000., 80000., 90000.]),
+                       "mortgage_principal": 1000000.,
+                       "mortgage_interest_rate": 0.03,
+                       "time": np.array([[5.], [15.]])}
+
+    def test_plottables_match_reference(self):
+        plottables = ["mortgage_principal_residual", "mortgage_principal_paid", "mortgage_interest_paid", "mortgage_escrow_paid",
+                      "mortgage_paid", "accrued_costs", "home_purchase_net_return", "no_home_purchase_total_return", "total_cost_residual"]
+        # 35000 does not cover the interest: every plottable that depends on the duration is out of domain
+        payments = [35000., 70000., 80000., 90000.]
+        times = [0., 5., 10., 15., 40.]
+        inputs = dict(self.inputs, mortgage_payment=np.array(payments), time=np.array([times]).T)
+        values = self.functions.scenario(**inputs).evaluate(plottables)
+        for plottable, value in zip(plottables, values):
+            expected = [[reference(plottable, 0.2, payment, 1000000., 0.03, time) for payment in payments] for time in times]
+            np.testing.assert_allclose(value, expected, equal_nan=True, err_msg=plottable)
+        self.assertAlmostEqual(float(self.functions.mortgage_principal_residual(0.2, 80000., 1000000., 0.03, 10.)), 713403.0172, places=3)
+
+    def test_duration_computed_once(self):
+        calls = []
+        original_log = me_calculator_scenario._log
+        def counting_log(value):
+            calls.append(value)
+            return original_log(value)
+        me_calculator_scenario._log = counting_log
+        try:
+            self.functions.scenario(**self.inputs).evaluate(["mortgage_interest_paid", "mortgage_escrow_paid", "total_cost_residual", "mortgage_duration"])
+        finally:
+            me_calculator_scenario._log = original_log
+        # mortgage_duration takes two logarithms
+        self.assertEqual(len(calls), 2)
+
+    def test_missing_input(self):
+        with self.assertRaises(TypeError):
+            self.functions.scenario(downpayment=0.2, mortgage_principal=1000000.).mortgage_duration
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import unittest
+
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_server import MeCalculatorServer
+
+
+async def request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write("{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\nConnection: close\r\n\r\n".format(method, path, len(payload)).encode() + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    response = await reader.read()
+    writer.close()
+    return status, json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+class TestMeCalculatorServer(unittest.TestCase):
+    def setUp(self):
+        self.config = {"closing_costs": 0.06, "escrow_rate": 0.02, "property_value_growth_rate": 0.07, "price_to_rent_ratio": 32, "market_rate_of_return": 0.07}
+        self.functions = MeCalculatorFunctions(**self.config)
+
+    def serve(self, client, **options):
+        async def run():
+            server = await MeCalculatorServer(port=0, **options).start()
+            try:
+                return await client(server)
+            finally:
+                await server.close()
+        return asyncio.run(run())
+
+    def test_evaluate_coalesced(self):
+        times = np.linspace(0., 40., 50)
+        plottables = ["mortgage_principal_residual", "home_purchase_net_return"]
+
+        async def client(server):
+            body = lambda time: {"plottables": plottables, "config": self.config,
+                                 "inputs": {"downpayment": 0.2, "mortgage_payment": 76000., "mortgage_principal": 1200000., "mortgage_interest_rate": 0.03, "time": time}}
+            responses = await asyncio.gather(*[request(server.port, "POST", "/evaluate", body(time)) for time in times])
+            return responses, server.stats()
+
+        responses, stats = self.serve(client, window=0.05)
+        for time, (status, response) in zip(times, responses):
+            self.assertEqual(status, 200)
+            for plottable in plottables:
+                expected = getattr(self.functions, plottable)(0.2, 76000., 1200000., 0.03, time)
+                if np.isnan(expected):
+                    self.assertIsNone(response["values"][plottable])
+                else:
+                    self.assertAlmostEqual(response["values"][plottable], expected, 6)
+        self.assertLess(stats["batches"], len(times))
+        self.assertEqual(stats["endpoints"]["/evaluate"]["requests"], len(times))
+        self.assertLessEqual(stats["endpoints"]["/evaluate"]["p50"], stats["endpoints"]["/evaluate"]["p99"])
+
+    def test_sweep_and_errors(self):
+        async def client(server):
+            sweep = await request(server.port, "POST", "/sweep", {"plottable": "mortgage_paid", "parameters": ["mortgage_interest_rate", "time"],
+                                                                   "ranges": [[0.01, 0.05], [0., 40.]], "resolution": [4, 5], "config": self.config,
+                                                                   "inputs": {"downpayment": 0.2, "mortgage_payment": 76000., "mortgage_principal": 1200000.}})
+            unknown = await request(server.port, "POST", "/evaluate", {"plottables": ["mortgage"], "inputs": {}})
+            missing = await request(server.port, "POST", "/evaluate", {"plottables": ["mortgage_paid"], "inputs": {"time": 1.}})
+            not_found = await request(server.port, "GET", "/nothing")
+            stats = await request(server.port, "GET", "/stats")
+            return sweep, unknown, missing, not_found, stats
+
+        sweep, unknown, missing, not_found, stats = self.serve(client)
+        self.assertEqual(sweep[0], 200)
+        rates, times = sweep[1]["axes"]
+        np.testing.assert_allclose(rates, [0.01, 0.02, 0.03, 0.04])
+        values = np.array(sweep[1]["values"], dtype=float)
+        expected = self.functions.mortgage_paid(0.2, 76000., 1200000., np.array(rates)[:, None], np.array(times)[None, :])
+        np.testing.assert_allclose(values, expected, equal_nan=True)
+        self.assertEqual([unknown[0], missing[0], not_found[0]], [400, 400, 404])
+        self.assertIn("mortgage_payment", missing[1]["error"])
+        self.assertEqual(stats[0], 200)
+        self.assertEqual(stats[1]["endpoints"]["/sweep"]["requests"], 1)
+
+    def test_configurations(self):
+        # Requests with different configurations are batched together, and the configurations cached are bounded
+        escrow_rates = np.linspace(0.005, 0.02, 20)
+        inputs = {"downpayment": 0.2, "mortgage_payment": 76000., "mortgage_principal": 1200000., "mortgage_interest_rate": 0.03, "time": 10.}
+
+        async def client(server):
+            evaluations = await asyncio.gather(*[request(server.port, "POST", "/evaluate", {"plottables": ["mortgage_interest_paid"], "inputs": inputs,
+                                                                                           "config": dict(self.config, escrow_rate=escrow_rate)})
+                                                 for escrow_rate in escrow_rates])
+            for escrow_rate in escrow_rates[:5]:
+                await request(server.port, "POST", "/sweep", {"plottable": "mortgage_paid", "parameters": ["time"], "ranges": [[0., 40.]], "resolution": 4,
+                                                              "config": dict(self.config, escrow_rate=escrow_rate), "inputs": inputs})
+            return evaluations, server.stats(), len(server.functions)
+
+        evaluations, stats, configurations = self.serve(client, window=0.05, max_configurations=2)
+        for escrow_rate, (status, response) in zip(escrow_rates, evaluations):
+            self.assertEqual(status, 200)
+            expected = MeCalculatorFunctions(**dict(self.config, escrow_rate=escrow_rate)).mortgage_interest_paid(0.2, 76000., 1200000., 0.03, 10.)
+            self.assertAlmostEqual(response["values"]["mortgage_interest_paid"], expected, 6)
+        self.assertLess(stats["batches"], len(escrow_rates))
+        self.assertLessEqual(configurations, 2)
+
+    def test_inputs_and_configuration(self):
+        # The property_value_growth_rate argument and configuration are distinct, and inputs never change the configuration
+        inputs = {"downpayment": 0.2, "mortgage_payment": 76000., "mortgage_principal": 1200000., "mortgage_interest_rate": 0.03,
+                  "property_value_growth_rate": 0.01, "time": 10., "closing_costs": 0.5}
+
+        async def client(server):
+            return await asyncio.gather(request(server.port, "POST", "/evaluate", {"plottables": ["property_value", "home_purchase_total_return"],
+                                                                                  "inputs": inputs, "config": self.config}),
+                                        request(server.port, "POST", "/evaluate", {"plottables": ["total_cost", "property_value"],
+                                                                                  "inputs": inputs, "config": self.config}),
+                                        request(server.port, "POST", "/evaluate", {"plottables": ["total_cost", "total_cost"],
+                                                                                  "inputs": inputs, "config": self.config}))
+
+        first, second, repeated = self.serve(client, window=0.05)
+        self.assertEqual([first[0], second[0], repeated[0]], [200, 200, 400])
+        self.assertAlmostEqual(first[1]["values"]["property_value"], self.functions.property_value(0.2, 1200000., 0.01, 10.), 6)
+        self.assertAlmostEqual(first[1]["values"]["home_purchase_total_return"], self.functions.home_purchase_total_return(0.2, 76000., 1200000., 0.03, 10.), 6)
+        self.assertAlmostEqual(second[1]["values"]["total_cost"], self.functions.total_cost(0.2, 76000., 1200000., 0.03), 6)
+        self.assertAlmostEqual(second[1]["values"]["property_value"], first[1]["values"]["property_value"], 6)
+
+if __name__ == '__main__':
+    unittest.main()
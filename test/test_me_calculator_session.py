@@ -0,0 +1,70 @@
+import unittest
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+from me_calculator.me_calculator import MeCalculatorFunctions
+from me_calculator.me_calculator_errors import UnknownParameter
+from me_calculator.me_calculator_scenario import MeCalculatorScenario
+from me_calculator.me_calculator_session import MeCalculatorSession
+from test.me_calculator_fixtures import example_calculator
+
+
+class TestMeCalculatorSession(unittest.TestCase):
+    def setUp(self):
+        self.calculator = example_calculator()
+        self.session = MeCalculatorSession(self.calculator)
+        self.curves = self.session.add_view_1d("time", ["mortgage_principal_paid", "accrued_costs", "no_home_purchase_total_return"], resolution=100)
+        self.surface = self.session.add_view_2d("mortgage_principal", "time", "mortgage_interest_paid", resolution=(20, 10))
+
+    def tearDown(self):
+        import matplotlib.pyplot as plt
+        plt.close("all")
+
+    def test_invalidation(self):
+        # Swept parameters do not invalidate their own view, knobs invalidate the plottables that read them
+        recomputed = {id(view): plottables for view, plottables in self.session.update(mortgage_principal=1000000.)}
+        self.assertEqual(recomputed, {id(self.curves): ["mortgage_principal_paid", "accrued_costs", "no_home_purchase_total_return"]})
+        recomputed = {id(view): plottables for view, plottables in self.session.update(market_rate_of_return=0.05)}
+        self.assertEqual(recomputed, {id(self.curves): ["no_home_purchase_total_return"]})
+        self.assertEqual(self.session.update(pmi_insurance=0.00005), [])
+        self.assertEqual(self.calculator.functions.market_rate_of_return, 0.05)
+        expected = self.calculator.data_1d_plottables("time", ["mortgage_principal_paid", "no_home_purchase_total_return"], resolution=100)[1]
+        np.testing.assert_allclose(self.curves.values["mortgage_principal_paid"], expected[0], equal_nan=True)
+        np.testing.assert_allclose(self.curves.values["no_home_purchase_total_return"], expected[1], equal_nan=True)
+        with self.assertRaises(UnknownParameter):
+            self.session.update(interest=0.05)
+
+    def test_artists_reused(self):
+        figures = self.session.draw()
+        line = self.curves.artists["mortgage_principal_paid"]
+        image = self.surface.artists["mortgage_interest_paid"]
+        before = line.get_ydata().copy()
+        self.session.update(escrow_rate=0.01)
+        self.assertEqual(self.calculator.functions.escrow_rate, 0.01)
+        self.assertEqual(self.session.draw(), figures)
+        self.assertIs(self.curves.artists["mortgage_principal_paid"], line)
+        self.assertIs(self.surface.artists["mortgage_interest_paid"], image)
+        self.assertFalse(np.array_equal(line.get_ydata(), before))
+        valid = self.surface.valids["mortgage_interest_paid"]
+        np.testing.assert_allclose(np.asarray(image.get_array())[valid], self.surface.values["mortgage_interest_paid"][valid])
+
+    def test_declared_knobs(self):
+        # Every knob a plottable reads (include_escrow_expenses comes from escrow_rate) is declared in the registry
+        class Recorder:
+            def __init__(self, functions):
+                self.functions, self.read = functions, set()
+            def __getattr__(self, name):
+                self.read.add("escrow_rate" if name == "include_escrow_expenses" else name)
+                return getattr(self.functions, name)
+        functions = MeCalculatorFunctions(escrow_rate=0.02)
+        inputs = {"downpayment": 0.2, "mortgage_payment": 80000., "mortgage_duration": 30., "mortgage_principal": 1000000.,
+                  "mortgage_interest_rate": 0.03, "property_value_growth_rate": 0.05, "time": 10.}
+        for name, registered in MeCalculatorFunctions.plottables.items():
+            recorder = Recorder(functions)
+            MeCalculatorScenario(recorder, **{argument: inputs[argument] for argument in registered.arguments}).value(name)
+            self.assertLessEqual(recorder.read - {"plottables"}, set(registered.knobs), name)
+
+if __name__ == '__main__':
+    unittest.main()
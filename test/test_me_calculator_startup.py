@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# Generous bound for a cold import of the computational core (NumPy included)
+max_import_seconds = 1.5
+
+import_script = """
+import sys, time
+start = time.perf_counter()
+from me_calculator.me_calculator import MeCalculator, MeCalculatorFunctions
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(sorted(module for module in sys.modules if module.split('.')[0] in ('matplotlib', 'mpl_toolkits')))
+"""
+
+
+class TestMeCalculatorStartup(unittest.TestCase):
+    def setUp(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.check_output([sys.executable, "-c", import_script], cwd=root, universal_newlines=True)
+        elapsed, plotting_modules = output.strip().splitlines()
+        self.elapsed = float(elapsed)
+        self.plotting_modules = plotting_modules
+
+    def test_no_plotting_modules_loaded(self):
+        self.assertEqual(self.plotting_modules, "[]")
+
+    def test_import_time(self):
+        self.assertLess(self.elapsed, max_import_seconds)
+
+if __name__ == '__main__':
+    unittest.main()
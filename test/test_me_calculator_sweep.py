@@ -0,0 +1,69 @@
+import unittest
+import warnings
+
+import numpy as np
+
+from me_calculator.me_calculator_errors import UnknownParameter, UnknownPlottable
+from me_calculator.me_calculator_sweep import tile_indices, tile_shape
+from test.me_calculator_fixtures import example_calculator
+
+parameters = ["downpayment", "mortgage_interest_rate", "mortgage_principal", "time"]
+resolution = [3, 5, 4, 6]
+
+
+class TestMeCalculatorSweep(unittest.TestCase):
+    def setUp(self):
+        self.calculator = example_calculator()
+
+    def test_tiles(self):
+        shape = (3, 5, 4, 6)
+        for max_points in (1, 7, 24, 50, 1000):
+            tile = tile_shape(shape, max_points)
+            self.assertLessEqual(int(np.prod(tile)), max(1, max_points))
+            # Tiles cover the grid once, each a contiguous run of its C order
+            order = np.arange(np.prod(shape)).reshape(shape)
+            runs = [order[index].ravel() for index in tile_indices(shape, tile)]
+            self.assertTrue(all((np.diff(run) == 1).all() for run in runs))
+            np.testing.assert_array_equal(np.concatenate(runs), np.arange(np.prod(shape)))
+
+    def test_sweep(self):
+        plottables = ["home_purchase_net_return", "mortgage_interest_paid"]
+        axes, expected, _ = self.calculator.data_nd(parameters, plottables[1], resolution=resolution)
+        values = [np.full(expected.shape, -1.) for _ in plottables]
+        for tile in self.calculator.sweep(parameters, plottables, resolution=resolution, tile_points=14):
+            self.assertLessEqual(tile.values[0].size, 14)
+            for i, axis in enumerate(axes):
+                np.testing.assert_array_equal(tile.axes[i], axis[tile.index[i]])
+            for value, tile_value in zip(values, tile.values):
+                value[tile.index] = tile_value
+        np.testing.assert_array_equal(values[1], expected)
+        np.testing.assert_array_equal(values[0], self.calculator.data_nd(parameters, plottables[0], resolution=resolution)[1])
+
+    def test_sweep_reduce(self):
+        plottable = "mortgage_interest_paid"
+        axes, values, _ = self.calculator.data_nd(parameters, plottable, resolution=resolution)
+        # Some points are out of domain at every rate
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            expected = {"max": np.nanmax(values, axis=1), "min": np.nanmin(values, axis=1)}
+        self.assertTrue(np.isnan(expected["max"]).any())
+        filled = np.where(np.isnan(values), -np.inf, values)
+        expected["argmax"] = np.where(np.isnan(expected["max"]), np.nan, axes[1][np.argmax(filled, axis=1)])
+        for reduction, reduced in expected.items():
+            for tile_points in (5, 1 << 20):
+                reduced_axes, result = self.calculator.sweep_reduce(parameters, plottable, "mortgage_interest_rate", reduction,
+                                                                    resolution=resolution, tile_points=tile_points)
+                self.assertEqual([len(axis) for axis in reduced_axes], [3, 4, 6])
+                np.testing.assert_array_equal(result, reduced)
+
+    def test_argument_checks(self):
+        with self.assertRaises(UnknownPlottable):
+            self.calculator.sweep(parameters, ["not_a_plottable"])
+        with self.assertRaises(UnknownParameter):
+            self.calculator.sweep_reduce(parameters[:2], "mortgage_interest_paid", "time")
+        with self.assertRaises(ValueError):
+            self.calculator.sweep_reduce(parameters, "mortgage_interest_paid", "time", "mean")
+
+
+if __name__ == '__main__':
+    unittest.main()